@@ -1,5 +1,5 @@
 from fastapi import FastAPI, Request, HTTPException, Depends, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.openapi.utils import get_openapi
@@ -9,6 +9,8 @@ import asyncio
 import logging
 import time
 import os
+from contextlib import asynccontextmanager
+from cachetools import TTLCache
 
 # Import services based on how we're running the server
 try:
@@ -40,13 +42,27 @@ except ImportError:
 # --- Security and Monitoring ---
 API_KEY = os.getenv("API_GATEWAY_KEY", "test-key")
 RATE_LIMIT = 60  # requests per minute per user
-rate_limit_cache = {}
+# Keyed by (user, window); entries expire after two windows so memory stays bounded.
+# The cache is per process, so with N uvicorn workers the effective limit is up to N * RATE_LIMIT.
+rate_limit_cache = TTLCache(maxsize=100_000, ttl=120)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # --- FastAPI App ---
-app = FastAPI(title="Sustainable Travel Planner API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Release pooled HTTP connections held by the weather client
+    if weather_api is not None:
+        await weather_api.aclose()
+
+app = FastAPI(
+    title="Sustainable Travel Planner API",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 # --- Middleware ---
 app.add_middleware(
@@ -62,7 +78,7 @@ async def log_requests(request: Request, call_next):
     start_time = time.time()
     response = await call_next(request)
     process_time = time.time() - start_time
-    logger.info(f"{request.method} {request.url.path} completed in {process_time:.2f}s")
+    logger.info("%s %s completed in %.2fs", request.method, request.url.path, process_time)
     return response
 
 @app.middleware("http")
@@ -70,10 +86,10 @@ async def rate_limiter(request: Request, call_next):
     user = request.headers.get("Authorization", "anonymous")
     now = int(time.time())
     window = now // 60
-    key = f"{user}:{window}"
+    key = (user, window)
     count = rate_limit_cache.get(key, 0)
     if count >= RATE_LIMIT:
-        return JSONResponse(status_code=429, content={"detail": "Rate limit exceeded"})
+        return ORJSONResponse(status_code=429, content={"detail": "Rate limit exceeded"})
     rate_limit_cache[key] = count + 1
     return await call_next(request)
 
@@ -82,10 +98,10 @@ async def error_handler(request: Request, call_next):
     try:
         return await call_next(request)
     except ValidationError as ve:
-        return JSONResponse(status_code=422, content={"detail": ve.errors()})
+        return ORJSONResponse(status_code=422, content={"detail": ve.errors()})
     except Exception as e:
         logger.error(f"Unhandled error: {e}")
-        return JSONResponse(status_code=500, content={"detail": "Internal server error"})
+        return ORJSONResponse(status_code=500, content={"detail": "Internal server error"})
 
 # --- Auth ---
 auth_scheme = HTTPBearer()
@@ -133,65 +149,72 @@ except Exception as e:
     carbon_api = None
 
 # --- Endpoints ---
-@app.post("/v1/weather", response_model=WeatherResponse, tags=["Weather"])
+@app.post("/v1/weather", responses={200: {"model": WeatherResponse}}, tags=["Weather"])
 async def get_weather(req: WeatherRequest, auth: Any = Depends(authenticate)):
+    # Payloads are built from trusted service data, so skip response_model validation
     if weather_api is None:
-        return WeatherResponse(description="Weather service unavailable", suitability=None, alerts=None)
+        return ORJSONResponse({"description": "Weather service unavailable", "suitability": None, "alerts": None})
     
     try:
-        weather = await asyncio.to_thread(weather_api.get_current_weather, req.location)
-        suitability = {
-            act: weather_api.suitability_score(weather, act)
-            for act in ["hiking", "beach", "sightseeing"]
-        }
-        alerts = await asyncio.to_thread(weather_api.get_weather_alerts, req.location)
+        # Resolve coordinates once, then fetch current weather and alerts concurrently
+        coords = await weather_api.geocode(req.location)
+        if coords is None:
+            # Unknown location: both lookups would only geocode it again
+            weather, alerts = None, None
+        else:
+            weather, alerts = await asyncio.gather(
+                weather_api.get_current_weather(req.location, coords=coords),
+                weather_api.get_weather_alerts(req.location, coords=coords),
+            )
+        suitability = weather_api.suitability_scores(weather, ("hiking", "beach", "sightseeing"))
         desc = weather_api.format_weather_for_conversation(weather, req.location)
         alert_msg = weather_api.format_alerts_for_conversation(alerts, req.location)
-        return WeatherResponse(description=desc, suitability=suitability, alerts=alert_msg)
+        return ORJSONResponse({"description": desc, "suitability": suitability, "alerts": alert_msg})
     except Exception as e:
         logger.error(f"Weather API error: {e}")
-        return WeatherResponse(description=f"Weather service error: {str(e)}", suitability=None, alerts=None)
+        return ORJSONResponse({"description": f"Weather service error: {str(e)}", "suitability": None, "alerts": None})
 
-@app.post("/v1/carbon-footprint", response_model=CarbonResponse, tags=["Carbon"])
+def _carbon_fallback(score: str, message: str) -> ORJSONResponse:
+    return ORJSONResponse({
+        "total_emission": 0.0,
+        "breakdown": [],
+        "sustainability_score": score,
+        "offset_kg": 0.0,
+        "offset_price": 0.0,
+        "recommendations": [message]
+    })
+
+@app.post("/v1/carbon-footprint", responses={200: {"model": CarbonResponse}}, tags=["Carbon"])
 async def get_carbon(req: CarbonRequest, auth: Any = Depends(authenticate)):
+    # calculate_trip already returns a plain dict; hand it straight to orjson
     if carbon_api is None:
-        return CarbonResponse(
-            total_emission=0.0,
-            breakdown=[],
-            sustainability_score="unknown",
-            offset_kg=0.0,
-            offset_price=0.0,
-            recommendations=["Carbon service unavailable"]
-        )
+        return _carbon_fallback("unknown", "Carbon service unavailable")
     
     try:
-        result = await asyncio.to_thread(carbon_api.calculate_trip, req.trip)
-        return CarbonResponse(**result)
+        # Local-factor trips are sub-millisecond CPU work; only hop to a thread when Climatiq is called
+        if carbon_api.requires_climatiq(req.trip):
+            result = await asyncio.to_thread(carbon_api.calculate_trip, req.trip)
+        else:
+            result = carbon_api.calculate_trip(req.trip)
+        return ORJSONResponse(result)
     except Exception as e:
         logger.error(f"Carbon API error: {e}")
-        return CarbonResponse(
-            total_emission=0.0,
-            breakdown=[],
-            sustainability_score="error",
-            offset_kg=0.0,
-            offset_price=0.0,
-            recommendations=[f"Carbon service error: {str(e)}"]
-        )
-
-@app.post("/v1/eco-recommendations", response_model=ChatResponse, tags=["Eco"])
+        return _carbon_fallback("error", f"Carbon service error: {str(e)}")
+
+@app.post("/v1/eco-recommendations", responses={200: {"model": ChatResponse}}, tags=["Eco"])
 async def eco_recommendations(req: ChatRequest, auth: Any = Depends(authenticate)):
-    return ChatResponse(answer="Here are some eco-friendly travel tips: Use public transport, choose eco-friendly accommodations, pack light, and support local businesses.", sources=None)
+    return ORJSONResponse({"answer": "Here are some eco-friendly travel tips: Use public transport, choose eco-friendly accommodations, pack light, and support local businesses.", "sources": None})
 
-@app.post("/v1/chat", response_model=ChatResponse, tags=["Chat"])
+@app.post("/v1/chat", responses={200: {"model": ChatResponse}}, tags=["Chat"])
 async def chat(req: ChatRequest, auth: Any = Depends(authenticate)):
-    return ChatResponse(answer="[RAG response here - integration pending]", sources=None)
+    return ORJSONResponse({"answer": "[RAG response here - integration pending]", "sources": None})
 
 @app.get("/v1/health", tags=["Health"])
 async def health_check():
     try:
         weather_ok = weather_api is not None
         if weather_api:
-            test_weather = await asyncio.to_thread(weather_api.get_current_weather, "Berlin")
+            test_weather = await weather_api.get_current_weather("Berlin")
             weather_ok = test_weather is not None
         carbon_ok = carbon_api is not None
         return {
@@ -226,4 +249,13 @@ app.openapi = custom_openapi
 # --- For running directly ---
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Multiple workers need an import string rather than the app object
+    app_path = "apis.main:app" if __package__ else "main:app"
+    uvicorn.run(
+        app_path,
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+    )
\ No newline at end of file
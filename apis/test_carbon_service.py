@@ -0,0 +1,23 @@
+import pytest
+from apis.carbon_service import SUSTAINABILITY_GRADES, CarbonFootprintCalculator
+
+def linear_grade(emission_kg):
+    # The original range scan that the bisect lookup replaces
+    for low, high, grade in SUSTAINABILITY_GRADES:
+        if low <= emission_kg <= high:
+            return grade
+    return "F"
+
+@pytest.fixture
+def calculator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calc = CarbonFootprintCalculator(user_id="test")
+    yield calc
+    calc.close_history()
+
+@pytest.mark.parametrize("emission_kg", [
+    -1, -0.01, 0, 25, 50, 50.5, 51, 100, 100.5, 101, 200, 200.5, 201,
+    400, 400.5, 401, 800, 800.5, 801, 1e9, float("inf"),
+])
+def test_sustainability_score_matches_range_scan(calculator, emission_kg):
+    assert calculator.sustainability_score(emission_kg) == linear_grade(emission_kg)
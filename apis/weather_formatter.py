@@ -16,13 +16,13 @@ def format_current_weather(weather: Dict, location: str) -> str:
 def format_forecast(forecast: Dict, location: str) -> str:
     if not forecast or "list" not in forecast:
         return f"Sorry, I couldn't retrieve the forecast for {location}."
-    msg = f"5-day forecast for {location}:\n"
-    for entry in forecast["list"][:5]:
-        dt_txt = entry["dt_txt"]
-        desc = entry["weather"][0]["description"].capitalize()
-        temp = entry["main"]["temp"]
-        msg += f"- {dt_txt}: {desc}, {temp}°C\n"
-    return msg
+    lines = [f"5-day forecast for {location}:"]
+    lines.extend(
+        f"- {entry['dt_txt']}: {entry['weather'][0]['description'].capitalize()}, {entry['main']['temp']}°C"
+        for entry in forecast["list"][:5]
+    )
+    lines.append("")  # keep the trailing newline
+    return "\n".join(lines)
 
 def format_historical_weather(hist: Dict, location: str) -> str:
     if not hist or "current" not in hist:
@@ -34,7 +34,7 @@ def format_historical_weather(hist: Dict, location: str) -> str:
 def format_alerts(alerts: List[Dict], location: str) -> str:
     if not alerts:
         return f"There are no weather alerts for {location}."
-    msg = f"Weather alerts for {location}:\n"
-    for alert in alerts:
-        msg += f"- {alert.get('event', 'Alert')}: {alert.get('description', '')}\n"
-    return msg
+    lines = [f"Weather alerts for {location}:"]
+    lines.extend(f"- {alert.get('event', 'Alert')}: {alert.get('description', '')}" for alert in alerts)
+    lines.append("")  # keep the trailing newline
+    return "\n".join(lines)
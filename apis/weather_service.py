@@ -1,117 +1,233 @@
 import os
-import requests
+import asyncio
+import random
 import time
+import httpx
 import logging
 from typing import Dict, Any, Optional, Tuple
 from functools import lru_cache
+from cachetools import LRUCache, TTLCache
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 OPENWEATHERMAP_API_KEY = os.getenv("OPENWEATHERMAP_API_KEY", "demo-key")
 
+# (api_key, location) -> (lat, lon); shared across instances since city coordinates don't change.
+# functools.lru_cache can't memoize coroutines, so successful lookups are stored here explicitly.
+_GEOCODE_CACHE: LRUCache = LRUCache(maxsize=4096)
+
+# One pooled client for every WeatherAPI instance so keep-alive connections are reused app-wide
+_shared_client: Optional[httpx.AsyncClient] = None
+
+def _get_shared_client() -> httpx.AsyncClient:
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = httpx.AsyncClient(
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        )
+    return _shared_client
+
+async def close_shared_client():
+    if _shared_client is not None and not _shared_client.is_closed:
+        await _shared_client.aclose()
+
+# Retry/backoff: delay = base * 2**attempt + jitter, so concurrent retries don't stampede upstream
+RETRY_BASE_DELAY = 1.0
+RETRY_JITTER = 0.5
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+
+class _CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failed requests and short-circuits calls
+    until `reset_after` seconds pass; the next call then probes upstream again.
+    """
+    def __init__(self, threshold: int, reset_after: float):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.failures < self.threshold:
+            return True
+        return time.monotonic() - self.opened_at >= self.reset_after
+
+    def record_success(self):
+        self.failures = 0
+
+    def record_failure(self, error: Exception):
+        # Only upstream trouble counts: transport errors, 5xx and 429. Client errors (bad key,
+        # unknown location) and unparseable bodies say nothing about OpenWeatherMap's health.
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            if status < 500 and status != 429:
+                return
+        elif not isinstance(error, httpx.TransportError):
+            return
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+_breaker = _CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+
+# activity -> (good_min, good_max, needs_clear, good_score, bad_below, bad_above, bad_score)
+# "good" needs the temp in range and either clear skies or no rain; "bad" is rain or temp outside the bad bounds.
+SUITABILITY_RULES = {
+    "hiking": (10, 25, False, 90, 5, 30, 30),
+    "beach": (22, 32, True, 95, 18, float("inf"), 40),
+    "sightseeing": (8, 28, False, 85, 5, 32, 35),
+}
+DEFAULT_SUITABILITY = 60
+
+def _score_activity(temp: float, rain: bool, clear: bool, activity: str) -> int:
+    rule = SUITABILITY_RULES.get(activity)
+    if rule is None:
+        return DEFAULT_SUITABILITY
+    good_min, good_max, needs_clear, good_score, bad_below, bad_above, bad_score = rule
+    if good_min <= temp <= good_max and (clear if needs_clear else not rain):
+        return good_score
+    if rain or temp < bad_below or temp > bad_above:
+        return bad_score
+    return DEFAULT_SUITABILITY
+
 class WeatherAPI:
     """
     Weather API service for travel planning using OpenWeatherMap.
     Supports current weather, 5-day forecast, historical data, geocoding, reverse geocoding, alerts, and suitability scoring.
     Includes caching, retry logic, and error handling.
+    All network methods are coroutines backed by a module-level pooled httpx.AsyncClient (HTTP/2, keep-alive).
     """
     BASE_URL = "https://api.openweathermap.org/data/2.5"
     GEO_URL = "http://api.openweathermap.org/geo/1.0"
 
     def __init__(self, api_key: str = OPENWEATHERMAP_API_KEY):
         self.api_key = api_key
-        self._current_cache = {}
-        self._forecast_cache = {}
-        self._cache_times = {}
-
-    def _cache_get(self, cache: dict, key: str, expiry: int) -> Optional[Any]:
-        now = time.time()
-        if key in cache and (now - self._cache_times.get(key, 0)) < expiry:
-            return cache[key]
-        return None
+        self._current_cache = TTLCache(maxsize=512, ttl=3600)
+        self._forecast_cache = TTLCache(maxsize=512, ttl=21600)
+        # cache_key -> pending fetch, so concurrent cache misses share one upstream call
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        return _get_shared_client()
 
-    def _cache_set(self, cache: dict, key: str, value: Any):
-        cache[key] = value
-        self._cache_times[key] = time.time()
+    async def aclose(self):
+        # Closes the shared pool; intended for application shutdown
+        await close_shared_client()
 
-    def _request(self, url: str, params: dict, retries: int = 3) -> Optional[dict]:
+    async def _request(self, url: str, params: dict, retries: int = 3) -> Optional[dict]:
+        if not _breaker.allow():
+            logger.warning("OpenWeatherMap circuit open, skipping request: %s", url)
+            return None
+        last_error: Optional[Exception] = None
         for attempt in range(retries):
             try:
-                resp = requests.get(url, params=params, timeout=10)
+                resp = await self._client.get(url, params=params)
                 resp.raise_for_status()
+                _breaker.record_success()
                 return resp.json()
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                if status < 500 and status != 429:
+                    # A 4xx won't change on retry
+                    logger.error("API request rejected (%d): %s", status, url)
+                    return None
+                last_error = e
             except Exception as e:
-                logger.warning(f"API request failed (attempt {attempt+1}): {e}")
-                time.sleep(2 ** attempt)
+                last_error = e
+            logger.warning("API request failed (attempt %d): %s", attempt + 1, last_error)
+            if attempt < retries - 1:
+                await asyncio.sleep(RETRY_BASE_DELAY * 2 ** attempt + random.uniform(0, RETRY_JITTER))
+        _breaker.record_failure(last_error)
         logger.error(f"API request failed after {retries} attempts: {url}")
         return None
 
-    def geocode(self, location: str) -> Optional[Tuple[float, float]]:
+    async def _singleflight(self, key: str, fetch) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one caller being cancelled must not cancel the fetch the others are waiting on
+        return await asyncio.shield(task)
+
+    async def geocode(self, location: str) -> Optional[Tuple[float, float]]:
+        cache_key = (self.api_key, location)
+        if (coords := _GEOCODE_CACHE.get(cache_key)) is not None:
+            return coords
         url = f"{self.GEO_URL}/direct"
         params = {"q": location, "limit": 1, "appid": self.api_key}
-        data = self._request(url, params)
+        data = await self._request(url, params)
         if data and len(data) > 0:
-            return data[0]["lat"], data[0]["lon"]
+            coords = data[0]["lat"], data[0]["lon"]
+            _GEOCODE_CACHE[cache_key] = coords
+            return coords
         return None
 
-    def reverse_geocode(self, lat: float, lon: float) -> Optional[str]:
+    async def reverse_geocode(self, lat: float, lon: float) -> Optional[str]:
         url = f"{self.GEO_URL}/reverse"
         params = {"lat": lat, "lon": lon, "limit": 1, "appid": self.api_key}
-        data = self._request(url, params)
+        data = await self._request(url, params)
         if data and len(data) > 0:
             return data[0]["name"]
         return None
 
-    def get_current_weather(self, location: str) -> Optional[dict]:
+    async def get_current_weather(self, location: str, coords: Optional[Tuple[float, float]] = None) -> Optional[dict]:
         cache_key = f"current:{location}"
-        cached = self._cache_get(self._current_cache, cache_key, 3600)
-        if cached:
+        if (cached := self._current_cache.get(cache_key)) is not None:
             return cached
-        coords = self.geocode(location)
+        return await self._singleflight(cache_key, lambda: self._fetch_current(location, cache_key, coords))
+
+    async def _fetch_current(self, location: str, cache_key: str, coords: Optional[Tuple[float, float]]) -> Optional[dict]:
+        coords = coords or await self.geocode(location)
         if not coords:
             logger.error(f"Could not geocode location: {location}")
             return None
         url = f"{self.BASE_URL}/weather"
         params = {"lat": coords[0], "lon": coords[1], "appid": self.api_key, "units": "metric"}
-        data = self._request(url, params)
+        data = await self._request(url, params)
         if data:
-            self._cache_set(self._current_cache, cache_key, data)
+            self._current_cache[cache_key] = data
         return data
 
-    def get_forecast(self, location: str) -> Optional[dict]:
+    async def get_forecast(self, location: str) -> Optional[dict]:
         cache_key = f"forecast:{location}"
-        cached = self._cache_get(self._forecast_cache, cache_key, 21600)
-        if cached:
+        if (cached := self._forecast_cache.get(cache_key)) is not None:
             return cached
-        coords = self.geocode(location)
+        return await self._singleflight(cache_key, lambda: self._fetch_forecast(location, cache_key))
+
+    async def _fetch_forecast(self, location: str, cache_key: str) -> Optional[dict]:
+        coords = await self.geocode(location)
         if not coords:
             logger.error(f"Could not geocode location: {location}")
             return None
         url = f"{self.BASE_URL}/forecast"
         params = {"lat": coords[0], "lon": coords[1], "appid": self.api_key, "units": "metric"}
-        data = self._request(url, params)
+        data = await self._request(url, params)
         if data:
-            self._cache_set(self._forecast_cache, cache_key, data)
+            self._forecast_cache[cache_key] = data
         return data
 
-    def get_historical_weather(self, location: str, dt: int) -> Optional[dict]:
-        coords = self.geocode(location)
+    async def get_historical_weather(self, location: str, dt: int) -> Optional[dict]:
+        coords = await self.geocode(location)
         if not coords:
             logger.error(f"Could not geocode location: {location}")
             return None
         url = f"{self.BASE_URL}/onecall/timemachine"
         params = {"lat": coords[0], "lon": coords[1], "dt": dt, "appid": self.api_key, "units": "metric"}
-        return self._request(url, params)
+        return await self._request(url, params)
 
-    def get_weather_alerts(self, location: str) -> Optional[list]:
-        coords = self.geocode(location)
+    async def get_weather_alerts(self, location: str, coords: Optional[Tuple[float, float]] = None) -> Optional[list]:
+        coords = coords or await self.geocode(location)
         if not coords:
             logger.error(f"Could not geocode location: {location}")
             return None
         url = f"{self.BASE_URL}/onecall"
         params = {"lat": coords[0], "lon": coords[1], "appid": self.api_key, "units": "metric", "exclude": "current,minutely,hourly,daily"}
-        data = self._request(url, params)
+        data = await self._request(url, params)
         if data and "alerts" in data:
             return data["alerts"]
         return []
@@ -121,26 +237,17 @@ class WeatherAPI:
         Score weather suitability for an activity (e.g., hiking, sightseeing, beach).
         Returns 0-100.
         """
+        return self.suitability_scores(weather, (activity,))[activity]
+
+    def suitability_scores(self, weather: dict, activities) -> Dict[str, int]:
+        """Score several activities against one weather payload, parsing it only once."""
         if not weather or "main" not in weather:
-            return 0
+            return {activity: 0 for activity in activities}
         temp = weather["main"].get("temp", 20)
         desc = weather["weather"][0]["main"].lower()
-        if activity == "hiking":
-            if 10 <= temp <= 25 and "rain" not in desc:
-                return 90
-            if "rain" in desc or temp < 5 or temp > 30:
-                return 30
-        if activity == "beach":
-            if 22 <= temp <= 32 and "clear" in desc:
-                return 95
-            if temp < 18 or "rain" in desc:
-                return 40
-        if activity == "sightseeing":
-            if 8 <= temp <= 28 and "rain" not in desc:
-                return 85
-            if temp < 5 or temp > 32 or "rain" in desc:
-                return 35
-        return 60
+        rain = "rain" in desc
+        clear = "clear" in desc
+        return {activity: _score_activity(temp, rain, clear, activity) for activity in activities}
 
     def format_weather_for_conversation(self, weather: dict, location: str) -> str:
         if not weather:
@@ -158,7 +265,7 @@ class WeatherAPI:
     def format_alerts_for_conversation(self, alerts: list, location: str) -> str:
         if not alerts:
             return f"There are no weather alerts for {location}."
-        msg = f"Weather alerts for {location}:\n"
-        for alert in alerts:
-            msg += f"- {alert.get('event', 'Alert')}: {alert.get('description', '')}\n"
-        return msg
+        lines = [f"Weather alerts for {location}:"]
+        lines.extend(f"- {alert.get('event', 'Alert')}: {alert.get('description', '')}" for alert in alerts)
+        lines.append("")  # keep the trailing newline
+        return "\n".join(lines)
@@ -1,35 +1,155 @@
 # langchain_service/langchain_pipeline.py
 import os
+import re
 import logging
-from typing import Dict, Any, List
+import functools
+from typing import Dict, Any, List, Optional, Tuple
 from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.vectorstores import FAISS
+from langchain.embeddings.base import Embeddings
 from langchain.schema import Document
+import faiss
+import numpy as np
 import warnings
 
 # Suppress warnings
 warnings.filterwarnings("ignore")
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# Quantized ONNX export is built once and reused from disk
+ONNX_MODEL_DIR = os.getenv(
+    "EMBEDDING_ONNX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "all-MiniLM-L6-v2-onnx")
+)
+ONNX_QUANTIZATION = "avx512_vnni"
+ONNX_QUANTIZED_FILE = f"onnx/model_qint8_{ONNX_QUANTIZATION}.onnx"
+
+# Retrieval tiers by corpus size. Up to EXACT_SEARCH_MAX_DOCS documents a single exact cosine matvec
+# beats any index round-trip; larger corpora take candidates from a compressed index and rescore
+# RERANK_CANDIDATES of them against the float vectors. Sign-bit (1 bit/dim) codes scanned by Hamming
+# distance serve up to BINARY_SEARCH_MAX_DOCS; past that 4-bit PQ fast-scan codes (8 bytes/vector,
+# scored 32 at a time by SIMD table lookups) take over. From IVFPQ_MIN_DOCS the exhaustive code scan
+# is replaced by OPQ-rotated IVF + fast-scan PQ, which only visits IVF_NPROBE of the IVF_NLIST lists.
+EXACT_SEARCH_MAX_DOCS = 10_000
+BINARY_SEARCH_MAX_DOCS = 100_000
+PQ_FASTSCAN_FACTORY = "PQ16x4fs"
+IVF_NLIST = 256
+IVF_NPROBE = 16
+IVFPQ_FACTORY = f"OPQ16_64,IVF{IVF_NLIST},PQ16x4fs"
+IVFPQ_MIN_DOCS = 1_000_000
+RERANK_CANDIDATES = 10
+
+# Keyword routing for the canned responses: (branch, keywords) in priority order. Keywords match
+# as substrings, like the `word in question` checks they replace.
+ADVICE_ROUTES = (
+    ("destination", ("destination", "where")),
+    ("transport", ("transport", "flight", "train")),
+    ("accommodation", ("accommodation", "hotel", "stay")),
+    ("budget", ("budget", "cheap", "affordable")),
+    ("carbon", ("carbon", "footprint", "emissions")),
+)
+FALLBACK_ROUTES = (
+    ("destination", ("destination", "where", "place")),
+    ("transport", ("transport", "flight", "travel")),
+    ("accommodation", ("accommodation", "hotel")),
+)
+
+def _compile_router(routes) -> Tuple[re.Pattern, Dict[str, int]]:
+    # Zero-width lookahead so overlapping keywords are all seen in a single scan
+    keyword_priority = {kw: priority for priority, (_, keywords) in enumerate(routes) for kw in keywords}
+    pattern = re.compile("(?=(%s))" % "|".join(map(re.escape, keyword_priority)))
+    return pattern, keyword_priority
+
+def _route(text: str, routes, router: Tuple[re.Pattern, Dict[str, int]]) -> Optional[str]:
+    """Highest-priority branch whose keyword appears in text, or None."""
+    pattern, keyword_priority = router
+    best = min((keyword_priority[m.group(1)] for m in pattern.finditer(text)), default=None)
+    return None if best is None else routes[best][0]
+
+_ADVICE_ROUTER = _compile_router(ADVICE_ROUTES)
+_FALLBACK_ROUTER = _compile_router(FALLBACK_ROUTES)
+
+# Canonical phrasing per advice branch; a question goes to the branch whose phrasing embedding
+# is closest (cosine) to the question embedding already computed for retrieval
+BRANCH_QUERIES = (
+    ("destination", "Which sustainable destination or country should I visit? Where should I go?"),
+    ("transport", "How should I get there? Sustainable transport like trains, flights and buses"),
+    ("accommodation", "Where should I stay? Eco-friendly hotels and accommodation"),
+    ("budget", "How can I travel sustainably on a cheap, affordable budget?"),
+    ("carbon", "What is the carbon footprint and CO2 emissions of my trip?"),
+    ("generic", "General sustainable travel tips"),
+)
+
+ADVICE_RESPONSES = {
+    "transport": "For sustainable transportation: trains reduce emissions by 75% compared to flying. Choose direct flights when flying is necessary, use public transport at your destination, and consider electric vehicle rentals. For trips under 1000km, ground transport is more sustainable.",
+    "accommodation": "Choose sustainable accommodations with eco-certifications like Green Key or LEED. Look for properties with renewable energy, water conservation, waste reduction, and local sourcing. Eco-lodges, farm stays, and sustainable hostels are great options.",
+    "budget": "Budget sustainable travel tips: travel during shoulder seasons for 30-50% savings, use public transportation, stay in eco-hostels, eat at local restaurants, and choose free outdoor activities like hiking.",
+    "carbon": "Transportation emissions by mode per km: flights 255g CO2, cars 120g CO2, trains 35g CO2, buses 25g CO2. Reduce your footprint by choosing direct flights, packing light, staying longer in destinations, and offsetting through verified programs.",
+}
+FALLBACK_RESPONSES = {
+    "destination": "Top sustainable destinations include Costa Rica (renewable energy leader), Iceland (geothermal power), New Zealand (conservation focus), and countries with strong environmental policies.",
+    "transport": "For sustainable transport: trains reduce emissions by 75% vs flights, choose direct flights, use public transport, walk/cycle locally, and consider electric rentals.",
+    "accommodation": "Choose eco-certified accommodations with Green Key or LEED certification, renewable energy, water conservation, and local sourcing.",
+}
+DEFAULT_FALLBACK_RESPONSE = "For sustainable travel: minimize flights, use public transport, support local businesses, choose eco-certified accommodations, pack light, and respect environments."
+
+class QuantizedOnnxEmbeddings(Embeddings):
+    """MiniLM sentence embeddings served from a dynamically INT8-quantized ONNX model on CPU"""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, model_dir: str = ONNX_MODEL_DIR):
+        from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+        if not os.path.exists(os.path.join(model_dir, ONNX_QUANTIZED_FILE)):
+            logger.info(f"Exporting INT8 ONNX embedding model to {model_dir}")
+            fp32_model = SentenceTransformer(model_name, backend="onnx", device="cpu")
+            fp32_model.save(model_dir)
+            export_dynamic_quantized_onnx_model(fp32_model, ONNX_QUANTIZATION, model_dir)
+
+        self.model = SentenceTransformer(
+            model_dir,
+            backend="onnx",
+            device="cpu",
+            model_kwargs={"file_name": ONNX_QUANTIZED_FILE}
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_query_vector(text).tolist()
+
+    def embed_query_vector(self, text: str) -> np.ndarray:
+        """Unit-length float32 query embedding, straight from the ONNX session output (no list round-trip)"""
+        return self.model.encode(text, normalize_embeddings=True, convert_to_numpy=True)
+
 class SimpleSustainableTravelRAG:
     """Simplified RAG service for sustainable travel"""
     
     def __init__(self):
-        self.vectorstore = None
+        self.indexed = False
         self.embeddings = None
+        self._documents: List[Document] = []
+        self._doc_vectors = None
+        self._candidate_index = None
+        self._branch_labels = [label for label, _ in BRANCH_QUERIES]
+        self._branch_emb = None
         self._initialize()
     
     def _initialize(self):
         """Initialize embeddings and load knowledge base"""
         try:
-            # Initialize embeddings
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-MiniLM-L6-v2",
-                model_kwargs={'device': 'cpu'}
-            )
+            # Initialize embeddings (INT8 ONNX, falling back to the FP32 PyTorch model)
+            try:
+                self.embeddings = QuantizedOnnxEmbeddings()
+            except Exception as e:
+                logger.warning(f"Quantized ONNX embeddings unavailable, using FP32 model: {e}")
+                self.embeddings = HuggingFaceEmbeddings(
+                    model_name=EMBEDDING_MODEL_NAME,
+                    model_kwargs={'device': 'cpu'}
+                )
             
             # Load knowledge base
+            self._init_branch_embeddings()
             self._load_knowledge_base()
             logger.info("Sustainable Travel RAG initialized successfully")
             
@@ -90,17 +210,83 @@ class SimpleSustainableTravelRAG:
         ]
         
         if self.embeddings:
-            self.vectorstore = FAISS.from_documents(documents, self.embeddings)
-            logger.info("Knowledge base loaded into vector store")
+            texts = [doc.page_content for doc in documents]
+            self._index_vectors(documents, np.asarray(self.embeddings.embed_documents(texts), dtype="float32"))
+            self.indexed = True
+            logger.info("Knowledge base indexed")
+    
+    def _index_vectors(self, documents: List[Document], vectors: np.ndarray):
+        """
+        Keep L2-normalized document vectors for cosine scoring; corpora past EXACT_SEARCH_MAX_DOCS
+        also get a compressed candidate index: binary (sign per dim) Hamming, PQ fast-scan, then OPQ+IVF+PQ
+        """
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self._doc_vectors = vectors / np.maximum(norms, 1e-12)
+        self._documents = documents
+        self._candidate_index = None
+        if len(documents) > BINARY_SEARCH_MAX_DOCS:
+            factory = IVFPQ_FACTORY if len(documents) >= IVFPQ_MIN_DOCS else PQ_FASTSCAN_FACTORY
+            # Trained on the unit vectors, so PQ's L2 ranking approximates cosine
+            index = faiss.index_factory(vectors.shape[1], factory)
+            index.train(self._doc_vectors)
+            index.add(self._doc_vectors)
+            if factory == IVFPQ_FACTORY:
+                faiss.extract_index_ivf(index).nprobe = IVF_NPROBE
+            self._candidate_index = index
+            logger.info(f"Built {factory} candidate index over {len(documents)} documents")
+        elif len(documents) > EXACT_SEARCH_MAX_DOCS:
+            index = faiss.IndexBinaryFlat(vectors.shape[1])
+            index.add(np.packbits(vectors > 0, axis=1))
+            self._candidate_index = index
+    
+    def _embed_query(self, question: str) -> np.ndarray:
+        """Query embedding as one contiguous float32 array, reused by search and branch classification"""
+        if hasattr(self.embeddings, "embed_query_vector"):
+            return self.embeddings.embed_query_vector(question)
+        return np.asarray(self.embeddings.embed_query(question), dtype="float32")
+    
+    def _search(self, query_vector: np.ndarray, k: int) -> List[Document]:
+        """Exact cosine top-k for small corpora; otherwise candidates from the compressed index, reranked exactly"""
+        # Normalized in place; the branch argmax that reuses this vector is scale-invariant
+        query = np.asarray(query_vector, dtype="float32")
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        index = self._candidate_index
+        if index is None:
+            scores = self._doc_vectors @ query
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [self._documents[i] for i in top]
+        n_candidates = min(max(k, RERANK_CANDIDATES), index.ntotal)
+        # Binary indexes are queried with the packed sign bits, PQ indexes with the float vector
+        codes = np.packbits(query > 0)[None, :] if isinstance(index, faiss.IndexBinary) else query[None, :]
+        _, ids = index.search(codes, n_candidates)
+        candidates = ids[0][ids[0] >= 0]
+        scores = self._doc_vectors[candidates] @ query
+        top = candidates[np.argsort(-scores, kind="stable")[:k]]
+        return [self._documents[i] for i in top]
+    
+    def _init_branch_embeddings(self):
+        """Embed and L2-normalize the branch phrasings once, as a float32[B, d] matrix"""
+        vectors = np.asarray(self.embeddings.embed_documents([q for _, q in BRANCH_QUERIES]), dtype="float32")
+        self._branch_emb = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    
+    def _classify(self, question: str, query_vector: Optional[np.ndarray] = None) -> Optional[str]:
+        """Response branch for a question: cosine argmax over branch embeddings, else keyword routing"""
+        if query_vector is None or self._branch_emb is None:
+            return _route(question.lower(), ADVICE_ROUTES, _ADVICE_ROUTER)
+        label = self._branch_labels[int(np.argmax(self._branch_emb @ np.asarray(query_vector, dtype="float32")))]
+        return None if label == "generic" else label
     
     def get_travel_advice(self, question: str, user_context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Get sustainable travel advice"""
         try:
-            if not self.vectorstore:
+            if not self.indexed:
                 return self._fallback_response(question)
             
             # Search for relevant documents
-            docs = self.vectorstore.similarity_search(question, k=3)
+            query_vector = self._embed_query(question)
+            docs = self._search(query_vector, k=3)
             
             if not docs:
                 return self._fallback_response(question)
@@ -109,7 +295,7 @@ class SimpleSustainableTravelRAG:
             context = "\n".join([doc.page_content for doc in docs])
             
             # Generate response based on context
-            response = self._generate_response(question, context, user_context)
+            response = self._generate_response(question, context, user_context, query_vector=query_vector)
             
             return {
                 "answer": response,
@@ -121,44 +307,27 @@ class SimpleSustainableTravelRAG:
             logger.error(f"Error in get_travel_advice: {e}")
             return self._fallback_response(question)
     
-    def _generate_response(self, question: str, context: str, user_context: Dict[str, Any] = None) -> str:
+    def _generate_response(self, question: str, context: str, user_context: Dict[str, Any] = None,
+                           query_vector: Optional[np.ndarray] = None) -> str:
         """Generate response based on retrieved context"""
-        question_lower = question.lower()
-        
-        # Context-aware responses
-        if 'destination' in question_lower or 'where' in question_lower:
-            if 'costa rica' in context.lower():
+        # Context-aware responses; the query embedding (when given) picks the branch
+        branch = self._classify(question, query_vector)
+        if branch == "destination":
+            context_lower = context.lower()
+            if 'costa rica' in context_lower:
                 return "Costa Rica is an excellent choice for sustainable travel! It runs on 99% renewable energy and has 25% of its land protected as national parks. Stay in eco-lodges, use public transport, and participate in conservation tours."
-            elif 'iceland' in context.lower():
+            elif 'iceland' in context_lower:
                 return "Iceland is perfect for eco-conscious travelers! The country operates on 100% renewable energy from geothermal sources. Follow the Icelandic Pledge, stay on marked trails, and use geothermal facilities."
-        
-        elif any(word in question_lower for word in ['transport', 'flight', 'train']):
-            return "For sustainable transportation: trains reduce emissions by 75% compared to flying. Choose direct flights when flying is necessary, use public transport at your destination, and consider electric vehicle rentals. For trips under 1000km, ground transport is more sustainable."
-        
-        elif any(word in question_lower for word in ['accommodation', 'hotel', 'stay']):
-            return "Choose sustainable accommodations with eco-certifications like Green Key or LEED. Look for properties with renewable energy, water conservation, waste reduction, and local sourcing. Eco-lodges, farm stays, and sustainable hostels are great options."
-        
-        elif any(word in question_lower for word in ['budget', 'cheap', 'affordable']):
-            return "Budget sustainable travel tips: travel during shoulder seasons for 30-50% savings, use public transportation, stay in eco-hostels, eat at local restaurants, and choose free outdoor activities like hiking."
-        
-        elif any(word in question_lower for word in ['carbon', 'footprint', 'emissions']):
-            return "Transportation emissions by mode per km: flights 255g CO2, cars 120g CO2, trains 35g CO2, buses 25g CO2. Reduce your footprint by choosing direct flights, packing light, staying longer in destinations, and offsetting through verified programs."
+        elif branch is not None:
+            return ADVICE_RESPONSES[branch]
         
         # Default response using context
         return f"Based on sustainable travel best practices: {context[:200]}..." if len(context) > 200 else context
     
     def _fallback_response(self, question: str) -> Dict[str, Any]:
-        """Fallback when vectorstore is unavailable"""
-        question_lower = question.lower()
-        
-        if any(word in question_lower for word in ['destination', 'where', 'place']):
-            response = "Top sustainable destinations include Costa Rica (renewable energy leader), Iceland (geothermal power), New Zealand (conservation focus), and countries with strong environmental policies."
-        elif any(word in question_lower for word in ['transport', 'flight', 'travel']):
-            response = "For sustainable transport: trains reduce emissions by 75% vs flights, choose direct flights, use public transport, walk/cycle locally, and consider electric rentals."
-        elif any(word in question_lower for word in ['accommodation', 'hotel']):
-            response = "Choose eco-certified accommodations with Green Key or LEED certification, renewable energy, water conservation, and local sourcing."
-        else:
-            response = "For sustainable travel: minimize flights, use public transport, support local businesses, choose eco-certified accommodations, pack light, and respect environments."
+        """Fallback when the knowledge base isn't indexed"""
+        branch = _route(question.lower(), FALLBACK_ROUTES, _FALLBACK_ROUTER)
+        response = FALLBACK_RESPONSES.get(branch, DEFAULT_FALLBACK_RESPONSE)
         
         return {
             "answer": response,
@@ -166,11 +335,16 @@ class SimpleSustainableTravelRAG:
             "confidence": 0.5
         }
 
-# Global instance for easy import
-rag_service = SimpleSustainableTravelRAG()
+@functools.cache
+def get_rag_service() -> SimpleSustainableTravelRAG:
+    """
+    Process-wide instance, built on first use rather than at import, so importing this module
+    (e.g. during test collection) doesn't load or export the embedding model
+    """
+    return SimpleSustainableTravelRAG()
 
 # Simple function for backward compatibility
 def get_langchain_response(query: str) -> str:
     """Simple function interface for basic usage"""
-    result = rag_service.get_travel_advice(query)
+    result = get_rag_service().get_travel_advice(query)
     return result.get("answer", "I'm here to help with sustainable travel questions!")
\ No newline at end of file
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from langchain.embeddings.base import Embeddings
+from langchain_service import langchain_pipeline
+from langchain_service.langchain_pipeline import (
+    ADVICE_RESPONSES, ADVICE_ROUTES, BRANCH_QUERIES, SimpleSustainableTravelRAG, _ADVICE_ROUTER, _route
+)
+
+BRANCH_INDEX = {query: i for i, (_, query) in enumerate(BRANCH_QUERIES)}
+BUDGET_INDEX = [label for label, _ in BRANCH_QUERIES].index("budget")
+
+class MockEmbeddings(Embeddings):
+    # Branch phrasings embed to one-hot vectors; everything else (documents, questions) lands on "budget"
+    def _vector(self, text):
+        vector = np.zeros(len(BRANCH_QUERIES), dtype="float32")
+        vector[BRANCH_INDEX.get(text, BUDGET_INDEX)] = 1.0
+        return vector
+
+    def embed_documents(self, texts):
+        return [self._vector(text).tolist() for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text).tolist()
+
+@pytest.fixture
+def rag(monkeypatch):
+    monkeypatch.setattr(langchain_pipeline, "QuantizedOnnxEmbeddings", MockEmbeddings)
+    return SimpleSustainableTravelRAG()
+
+def test_branch_embeddings_survive_knowledge_base_load(rag):
+    assert rag._branch_emb is not None
+    assert rag._branch_emb.shape == (len(BRANCH_QUERIES), len(BRANCH_QUERIES))
+
+def test_classify_uses_query_embedding(rag):
+    question = "Where can I go cheaply?"
+    # Keyword routing would pick "destination" ("where"); the embedding points at "budget"
+    assert _route(question.lower(), ADVICE_ROUTES, _ADVICE_ROUTER) == "destination"
+    assert rag._classify(question, rag._embed_query(question)) == "budget"
+    assert rag.get_travel_advice(question)["answer"] == ADVICE_RESPONSES["budget"]
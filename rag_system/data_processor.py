@@ -1,15 +1,20 @@
 import os
 import re
-import json
+import asyncio
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator
 from bs4 import BeautifulSoup
-import requests
+import aiohttp
+import orjson
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 CHUNK_SIZE = 512  # tokens (approximate, by words for simplicity)
+SCRAPE_TIMEOUT = 10  # seconds per source
+
+_WS_RE = re.compile(r'\s+')
+# Matches up to CHUNK_SIZE consecutive words in one scan, so chunking doesn't build a Python str per word
+_CHUNK_RE = re.compile(r'\S+(?:\s+\S+){0,%d}' % (CHUNK_SIZE - 1))
 
 class DataProcessor:
     """
@@ -21,28 +26,46 @@ class DataProcessor:
         self.documents = []
 
     def scrape(self):
-        """Scrape data from all sources."""
-        for url in self.sources:
+        """Scrape data from all sources concurrently."""
+        pages = asyncio.run(self._scrape_all())
+        for url, html in zip(self.sources, pages):
+            if html is None:
+                continue
             try:
-                logger.info(f"Scraping {url}")
-                resp = requests.get(url, timeout=10)
-                soup = BeautifulSoup(resp.text, 'html.parser')
+                soup = BeautifulSoup(html, 'lxml')
                 # Example: extract all paragraphs
                 text = ' '.join([p.get_text() for p in soup.find_all('p')])
                 self.documents.append({"text": text, "source": url})
             except Exception as e:
-                logger.error(f"Failed to scrape {url}: {e}")
+                logger.error(f"Failed to parse {url}: {e}")
+
+    async def _scrape_all(self) -> List[Any]:
+        timeout = aiohttp.ClientTimeout(total=SCRAPE_TIMEOUT)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            return await asyncio.gather(*[self._scrape_one(session, url) for url in self.sources])
+
+    async def _scrape_one(self, session: aiohttp.ClientSession, url: str):
+        try:
+            logger.info(f"Scraping {url}")
+            async with session.get(url) as resp:
+                return await resp.text()
+        except Exception as e:
+            logger.error(f"Failed to scrape {url}: {e}")
+            return None
 
     def clean_text(self, text: str) -> str:
         """Clean and normalize text."""
-        text = re.sub(r'\s+', ' ', text)
+        text = _WS_RE.sub(' ', text)
         text = text.strip()
         return text
 
     def chunk_text(self, text: str) -> List[str]:
         """Chunk text into ~512 token (word) segments."""
-        words = text.split()
-        return [' '.join(words[i:i+CHUNK_SIZE]) for i in range(0, len(words), CHUNK_SIZE)]
+        return list(self.iter_chunks(text))
+
+    def iter_chunks(self, text: str) -> Iterator[str]:
+        """Lazily yield ~512 word chunks; expects text already normalized by clean_text."""
+        return (m.group() for m in _CHUNK_RE.finditer(text))
 
     def extract_metadata(self, doc: Dict[str, Any]) -> Dict[str, Any]:
         """Extract metadata from document (stub logic)."""
@@ -53,29 +76,34 @@ class DataProcessor:
             "sustainability_score": 80  # Stub value
         }
 
-    def process(self):
-        """Clean, chunk, and extract metadata for all documents."""
-        processed = []
+    def process(self) -> Iterator[Dict[str, Any]]:
+        """Clean, chunk, and extract metadata for all documents, yielding one chunk record at a time."""
         for doc in self.documents:
             clean = self.clean_text(doc["text"])
-            chunks = self.chunk_text(clean)
             meta = self.extract_metadata(doc)
-            for chunk in chunks:
-                processed.append({
+            for chunk in self.iter_chunks(clean):
+                yield {
                     "text": chunk,
                     "metadata": meta,
                     "source": doc["source"]
-                })
-        logger.info(f"Processed {len(processed)} chunks from {len(self.documents)} documents.")
-        return processed
+                }
 
-    def save(self, processed: List[Dict[str, Any]], out_path: str):
-        with open(out_path, 'w', encoding='utf-8') as f:
+    def save(self, processed: Iterable[Dict[str, Any]], out_path: str):
+        """Write chunk records as JSON lines; accepts the process() generator so chunks are never all resident."""
+        count = 0
+        with open(out_path, 'wb') as f:
             for doc in processed:
-                f.write(json.dumps(doc) + '\n')
-        logger.info(f"Saved processed data to {out_path}")
+                f.write(orjson.dumps(doc))
+                f.write(b'\n')
+                count += 1
+        logger.info(f"Saved {count} chunks from {len(self.documents)} documents to {out_path}")
 
 if __name__ == "__main__":
+    try:
+        import logging_config  # Ensures logging is configured
+    except ImportError:
+        # Running outside the project root (e.g. the standalone rag_system image)
+        logging.basicConfig(level=logging.INFO)
     sources = [
         # Add real eco-travel URLs or use local HTML files for testing
         "https://www.example.com/eco-hotel",
@@ -1,18 +1,43 @@
+import os
 import json
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from sentence_transformers import SentenceTransformer
 import numpy as np
+import torch
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Embedding matrices are stored as contiguous float16 .npy next to the metadata jsonl
+EMBEDDINGS_DTYPE = np.float16
+
+ENCODE_BATCH_SIZE = 256
+# INT8 dynamically quantized ONNX export shipped with the sentence-transformers MiniLM repo (CPU path)
+ONNX_QUANTIZED_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+
+def embeddings_matrix_path(out_path: str) -> str:
+    """Path of the .npy matrix that pairs with a metadata jsonl written by save_embeddings."""
+    return os.path.splitext(out_path)[0] + ".emb.npy"
+
 class EmbeddingsGenerator:
     """
     Generates embeddings for knowledge base documents using sentence-transformers.
     """
     def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
-        self.model = SentenceTransformer(model_name)
+        if torch.cuda.is_available():
+            # FP16 weights so the encoder GEMMs run on tensor cores
+            self.model = SentenceTransformer(model_name, device='cuda', model_kwargs={"torch_dtype": torch.float16})
+        else:
+            try:
+                self.model = SentenceTransformer(
+                    model_name,
+                    backend="onnx",
+                    device="cpu",
+                    model_kwargs={"file_name": ONNX_QUANTIZED_FILE}
+                )
+            except Exception as e:
+                logger.warning(f"INT8 ONNX model unavailable, using FP32 on CPU: {e}")
+                self.model = SentenceTransformer(model_name, device="cpu")
 
     def load_knowledge_base(self, kb_path: str) -> List[Dict[str, Any]]:
         docs = []
@@ -25,19 +50,44 @@ class EmbeddingsGenerator:
     def generate_embeddings(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         texts = [doc['text'] for doc in docs]
         logger.info(f"Generating embeddings for {len(texts)} chunks...")
-        embeddings = self.model.encode(texts, show_progress_bar=True, convert_to_numpy=True)
+        # encode() already length-sorts each call internally, so large batches carry little padding
+        embeddings = self.model.encode(
+            texts,
+            batch_size=ENCODE_BATCH_SIZE,
+            show_progress_bar=True,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        # Rows stay as ndarray views; save_embeddings writes them out as one binary matrix
         for i, doc in enumerate(docs):
-            doc['embedding'] = embeddings[i].tolist()
+            doc['embedding'] = embeddings[i]
         logger.info("Embeddings generated.")
         return docs
 
     def save_embeddings(self, docs: List[Dict[str, Any]], out_path: str):
+        """Write metadata (one JSON line per doc, with its matrix row) to out_path and embeddings to a float16 .npy."""
+        matrix = np.asarray([doc['embedding'] for doc in docs], dtype=EMBEDDINGS_DTYPE)
+        np.save(embeddings_matrix_path(out_path), matrix)
         with open(out_path, 'w', encoding='utf-8') as f:
-            for doc in docs:
-                f.write(json.dumps(doc) + '\n')
-        logger.info(f"Saved embeddings to {out_path}")
+            for row, doc in enumerate(docs):
+                meta = {k: v for k, v in doc.items() if k != 'embedding'}
+                meta['row'] = row
+                f.write(json.dumps(meta) + '\n')
+        logger.info(f"Saved {matrix.shape} embeddings to {embeddings_matrix_path(out_path)}")
+
+    @staticmethod
+    def load_embeddings(out_path: str) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """Load metadata and a memory-mapped (read-only) float16 embedding matrix."""
+        with open(out_path, 'r', encoding='utf-8') as f:
+            docs = [json.loads(line) for line in f]
+        return docs, np.load(embeddings_matrix_path(out_path), mmap_mode='r')
 
 if __name__ == "__main__":
+    try:
+        import logging_config  # Ensures logging is configured
+    except ImportError:
+        # Running outside the project root (e.g. the standalone rag_system image)
+        logging.basicConfig(level=logging.INFO)
     kb_path = "rag_system/sample_knowledge_base.jsonl"
     out_path = "rag_system/knowledge_base_with_embeddings.jsonl"
     generator = EmbeddingsGenerator()
@@ -1,12 +1,14 @@
 import logging
 import os
+import numpy as np
 from rag_system.data_processor import DataProcessor
-from rag_system.embeddings_generator import EmbeddingsGenerator
-import json
+from rag_system.embeddings_generator import EmbeddingsGenerator, EMBEDDINGS_DTYPE, embeddings_matrix_path
+import orjson
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+READ_BUFFER_SIZE = 1 << 20
+
 class KnowledgeBaseBuilder:
     """
     Automates the pipeline: scrape/process data, generate embeddings, validate, and log.
@@ -20,8 +22,8 @@ class KnowledgeBaseBuilder:
         # Step 1: Scrape and process data
         processor = DataProcessor(self.sources)
         processor.scrape()
-        processed = processor.process()
-        processor.save(processed, self.kb_path)
+        # process() is a generator: chunks stream straight to disk
+        processor.save(processor.process(), self.kb_path)
         logger.info("Data scraping and processing complete.")
 
         # Step 2: Validate processed data
@@ -39,9 +41,9 @@ class KnowledgeBaseBuilder:
 
     def validate_data(self, kb_path):
         logger.info("Validating processed data...")
-        with open(kb_path, 'r', encoding='utf-8') as f:
+        with open(kb_path, 'rb', buffering=READ_BUFFER_SIZE) as f:
             for i, line in enumerate(f):
-                doc = json.loads(line)
+                doc = orjson.loads(line)
                 assert 'text' in doc and doc['text'], f"Missing text in doc {i}"
                 assert 'metadata' in doc, f"Missing metadata in doc {i}"
                 meta = doc['metadata']
@@ -52,14 +54,20 @@ class KnowledgeBaseBuilder:
 
     def validate_embeddings(self, emb_path):
         logger.info("Validating embeddings...")
-        with open(emb_path, 'r', encoding='utf-8') as f:
-            for i, line in enumerate(f):
-                doc = json.loads(line)
-                assert 'embedding' in doc, f"Missing embedding in doc {i}"
-                assert isinstance(doc['embedding'], list), f"Embedding is not a list in doc {i}"
+        with open(emb_path, 'rb', buffering=READ_BUFFER_SIZE) as f:
+            rows = [orjson.loads(line)['row'] for line in f]
+        matrix = np.load(embeddings_matrix_path(emb_path), mmap_mode='r')
+        assert matrix.ndim == 2, f"Embedding matrix has shape {matrix.shape}"
+        assert matrix.dtype == EMBEDDINGS_DTYPE, f"Embedding matrix has dtype {matrix.dtype}"
+        assert rows == list(range(matrix.shape[0])), "Embedding rows do not match metadata lines"
         logger.info("Embeddings validation passed.")
 
 if __name__ == "__main__":
+    try:
+        import logging_config  # Ensures logging is configured
+    except ImportError:
+        # Running outside the project root (e.g. the standalone rag_system image)
+        logging.basicConfig(level=logging.INFO)
     sources = [
         "https://www.example.com/eco-hotel",
         "https://www.example.com/green-transport"
@@ -1,47 +1,44 @@
 import logging
 import time
-from typing import List, Dict, Any, Optional
-from langchain.llms import HuggingFacePipeline
-from langchain.chains import RetrievalQA
+import hashlib
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 from langchain.prompts import PromptTemplate
-from langchain.memory import ConversationBufferMemory
-from langchain.cache import InMemoryCache
 from langchain.schema import Document
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
-import torch
+from transformers import AutoTokenizer
+from vllm import LLM, SamplingParams
+import numpy as np
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Default chat model, and its pre-quantized 4-bit AWQ checkpoint that vLLM runs on fused INT4 (Marlin) kernels
+MODEL_NAME = "meta-llama/Llama-2-7b-chat-hf"
+AWQ_MODEL_NAME = "TheBloke/Llama-2-7B-Chat-AWQ"
+
+CACHE_MAX_ENTRIES = 1024  # answered questions kept in the LRU response cache
+
 class RAGProcessor:
     """
     Retrieval-Augmented Generation pipeline for sustainable travel queries using LangChain and LLaMA-2-7B-Chat.
-    Features: custom prompts, context window, response filtering, fact-checking, memory, streaming, caching, and monitoring.
+    Features: custom prompts, context window, response filtering, fact-checking, streaming, caching, and monitoring.
     """
-    def __init__(self, retriever, model_name: str = "meta-llama/Llama-2-7b-chat-hf", quantized: bool = True):
+    def __init__(self, retriever, model_name: Optional[str] = None, quantized: bool = True):
+        """
+        model_name is the checkpoint to load: an AWQ checkpoint when quantized (default AWQ_MODEL_NAME),
+        full-precision weights otherwise (default MODEL_NAME)
+        """
         self.retriever = retriever
-        self.cache = InMemoryCache()
-        self.memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+        model_name = model_name or (AWQ_MODEL_NAME if quantized else MODEL_NAME)
+        # 16-byte blake2b digest of the question -> answer, in LRU order
+        self._cache: "OrderedDict[bytes, str]" = OrderedDict()
+        # Tokenizer is only used for token accounting and comes from the same repo as the weights;
+        # generation runs on vLLM (paged KV cache)
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        quantization_config = {"load_in_4bit": True} if quantized else {}
-        self.model = AutoModelForCausalLM.from_pretrained(model_name, **quantization_config)
-        self.llm_pipeline = pipeline(
-            "text-generation",
-            model=self.model,
-            tokenizer=self.tokenizer,
-            max_new_tokens=512,
-            temperature=0.2,
-            device_map="auto"
-        )
-        self.llm = HuggingFacePipeline(pipeline=self.llm_pipeline)
-        self.qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            retriever=self.retriever,
-            chain_type="stuff",
-            memory=self.memory,
-            return_source_documents=True,
-            verbose=True
-        )
+        if quantized:
+            self.llm = LLM(model=model_name, quantization="awq_marlin", dtype="float16")
+        else:
+            self.llm = LLM(model=model_name, dtype="bfloat16")
+        self.sampling_params = SamplingParams(temperature=0.2, max_tokens=512)
         self.prompt_template = PromptTemplate(
             input_variables=["context", "question"],
             template="""
@@ -70,11 +67,31 @@ Eco-Travel Answer:
         # Stub: In production, use external fact-checking APIs or rules
         return True
 
+    def _finalize(self, question: str, answer: str, context: str) -> str:
+        """Filter and fact-check a generated answer, then cache it; shared by ask, ask_stream and ask_many"""
+        answer = self._filter_response(answer)
+        if not self._fact_check(answer, context):
+            answer = "[Fact-check failed: Please verify this information.]"
+        self._cache_set(question, answer)
+        return answer
+
+    @staticmethod
+    def _cache_key(query: str) -> bytes:
+        return hashlib.blake2b(query.encode("utf-8"), digest_size=16).digest()
+
     def _cache_get(self, query: str) -> Optional[str]:
-        return self.cache.lookup(query)
+        key = self._cache_key(query)
+        response = self._cache.get(key)
+        if response is not None:
+            self._cache.move_to_end(key)
+        return response
 
     def _cache_set(self, query: str, response: str):
-        self.cache.update(query, response)
+        key = self._cache_key(query)
+        self._cache[key] = response
+        self._cache.move_to_end(key)
+        if len(self._cache) > CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
 
     def _track_performance(self, start_time: float, tokens: int):
         elapsed = time.time() - start_time
@@ -82,43 +99,121 @@ Eco-Travel Answer:
         self.token_usage += tokens
         logger.info(f"Response time: {elapsed:.2f}s, Tokens used: {tokens}")
 
+    def _generate(self, prompts: List[str]) -> List[tuple]:
+        """Run prompts through vLLM in one call; returns (text, prompt + completion tokens) per prompt, in order."""
+        outputs = self.llm.generate(prompts, self.sampling_params, use_tqdm=False)
+        return [
+            (out.outputs[0].text, len(out.prompt_token_ids) + len(out.outputs[0].token_ids))
+            for out in outputs
+        ]
+
+    def _prepare(self, question: str) -> Tuple[List[Document], str, str]:
+        # Retrieval + prompt assembly
+        docs = self.retriever.get_relevant_documents(question)
+        context = "\n".join([doc.page_content for doc in docs])
+        prompt = self.prompt_template.format(context=context, question=question)
+        return docs, context, prompt
+
     def ask(self, question: str, stream: bool = False) -> Dict[str, Any]:
+        if stream:
+            # Kept for backward compatibility; prefer ask_stream()
+            return self.ask_stream(question)
         # Caching
         cached = self._cache_get(question)
         if cached:
             logger.info("Cache hit for query.")
             return {"answer": cached, "cached": True}
-        # Retrieval
-        docs = self.retriever.get_relevant_documents(question)
-        context = "\n".join([doc.page_content for doc in docs])
-        prompt = self.prompt_template.format(context=context, question=question)
+        docs, context, prompt = self._prepare(question)
         # Generation
         start_time = time.time()
-        if stream:
-            # Streaming response (generator)
-            for chunk in self.llm_pipeline(prompt, stream=True):
-                yield chunk["generated_text"]
-            tokens = len(self.tokenizer.encode(prompt))
-        else:
-            result = self.llm_pipeline(prompt)
-            answer = result[0]["generated_text"]
-            tokens = len(self.tokenizer.encode(prompt + answer))
-            answer = self._filter_response(answer)
-            if not self._fact_check(answer, context):
-                answer = "[Fact-check failed: Please verify this information.]"
-            self._cache_set(question, answer)
-            self._track_performance(start_time, tokens)
-            return {
+        answer, tokens = self._generate([prompt])[0]
+        answer = self._finalize(question, answer, context)
+        self._track_performance(start_time, tokens)
+        return {
+            "answer": answer,
+            "source_documents": [doc.metadata for doc in docs],
+            "tokens": tokens,
+            "response_time": self.response_times[-1],
+            "cached": False
+        }
+
+    def ask_stream(self, question: str) -> Iterator[str]:
+        """Yield answer text chunks; offline vLLM returns the completion in one piece."""
+        cached = self._cache_get(question)
+        if cached:
+            logger.info("Cache hit for query.")
+            yield cached
+            return
+        _, context, prompt = self._prepare(question)
+        start_time = time.time()
+        answer, tokens = self._generate([prompt])[0]
+        answer = self._finalize(question, answer, context)
+        self._track_performance(start_time, tokens)
+        yield answer
+
+    def _retrieve_many(self, questions: List[str]) -> List[List[Document]]:
+        """Retrieve documents for several questions with one batched embed + index search when possible."""
+        vectorstore = getattr(self.retriever, "vectorstore", None)
+        if vectorstore is None or not hasattr(vectorstore, "index") or not hasattr(vectorstore, "docstore"):
+            return self.retriever.batch(questions)
+        k = getattr(self.retriever, "search_kwargs", {}).get("k", 4)
+        query_vectors = np.asarray(vectorstore.embeddings.embed_documents(questions), dtype="float32")
+        _, indices = vectorstore.index.search(query_vectors, k)
+        results = []
+        for row in indices:
+            results.append([
+                vectorstore.docstore.search(vectorstore.index_to_docstore_id[i])
+                for i in row if i != -1
+            ])
+        return results
+
+    def ask_many(self, questions: List[str]) -> List[Dict[str, Any]]:
+        """
+        Batched variant of ask(): cached questions are answered directly, the rest share
+        one retrieval pass and one vLLM generate call (continuous batching).
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(questions)
+        pending = []
+        for i, question in enumerate(questions):
+            cached = self._cache_get(question)
+            if cached:
+                results[i] = {"answer": cached, "cached": True}
+            else:
+                pending.append(i)
+        if not pending:
+            return results
+
+        pending_questions = [questions[i] for i in pending]
+        docs_per_question = self._retrieve_many(pending_questions)
+        contexts = ["\n".join(doc.page_content for doc in docs) for docs in docs_per_question]
+        prompts = [
+            self.prompt_template.format(context=context, question=question)
+            for context, question in zip(contexts, pending_questions)
+        ]
+
+        start_time = time.time()
+        outputs = self._generate(prompts)
+        elapsed = (time.time() - start_time) / len(prompts)
+
+        for i, question, docs, context, (answer, tokens) in zip(
+            pending, pending_questions, docs_per_question, contexts, outputs
+        ):
+            answer = self._finalize(question, answer, context)
+            self.response_times.append(elapsed)
+            self.token_usage += tokens
+            results[i] = {
                 "answer": answer,
                 "source_documents": [doc.metadata for doc in docs],
                 "tokens": tokens,
-                "response_time": self.response_times[-1],
+                "response_time": elapsed,
                 "cached": False
             }
+        logger.info(f"Answered {len(pending)} queries in batch ({elapsed:.2f}s avg)")
+        return results
 
     def get_stats(self):
         return {
             "total_tokens": self.token_usage,
             "avg_response_time": sum(self.response_times) / len(self.response_times) if self.response_times else 0,
-            "cache_size": len(self.cache.store)
+            "cache_size": len(self._cache)
         }
@@ -2,12 +2,23 @@ import os
 import pinecone
 import asyncio
 import aiohttp
-from typing import List, Dict, Any, Optional
+import numpy as np
+import orjson
+from itertools import islice
+from typing import List, Dict, Any, Optional, Iterable, Iterator
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+FETCH_BATCH_SIZE = 100  # ids per fetch call during backup
+UPSERT_CONCURRENCY = 30  # upsert requests in flight at once
+QUERY_CONCURRENCY = 30  # query requests in flight at once in query_batch
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[tuple]:
+    it = iter(iterable)
+    while chunk := tuple(islice(it, size)):
+        yield chunk
+
 class PineconeManager:
     """
     Async manager for Pinecone vector database integration.
@@ -28,34 +39,67 @@ class PineconeManager:
         self.index = pinecone.Index(self.index_name)
 
     async def upsert_vectors(self, vectors: List[Dict[str, Any]], batch_size: int = 100):
-        """Upsert vectors in batches."""
+        """Upsert vectors in batches, with up to UPSERT_CONCURRENCY batches in flight."""
         if not self.index:
             self.index = pinecone.Index(self.index_name)
-        for i in range(0, len(vectors), batch_size):
-            batch = vectors[i:i+batch_size]
-            ids = [v['id'] for v in batch]
-            embeds = [v['embedding'] for v in batch]
-            meta = [v['metadata'] for v in batch]
-            to_upsert = list(zip(ids, embeds, meta))
-            self.index.upsert(vectors=to_upsert)
-            logger.info(f"Upserted batch {i//batch_size+1} of {len(vectors)//batch_size+1}")
+        batches = [
+            [
+                (v['id'], v['embedding'].tolist() if isinstance(v['embedding'], np.ndarray) else v['embedding'], v['metadata'])
+                for v in chunk
+            ]
+            for chunk in _chunks(vectors, batch_size)
+        ]
+        semaphore = asyncio.Semaphore(UPSERT_CONCURRENCY)
+
+        async def upsert(batch_no: int, to_upsert: List[tuple]):
+            async with semaphore:
+                # The client is blocking; run each upsert on a worker thread
+                await asyncio.to_thread(self.index.upsert, vectors=to_upsert)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Upserted batch {batch_no} of {len(batches)}")
+
+        await asyncio.gather(*[upsert(n, batch) for n, batch in enumerate(batches, 1)])
 
     async def query(self, query_vector: List[float], top_k: int = 10, filters: Optional[Dict[str, Any]] = None, similarity_threshold: float = 0.7) -> List[Dict[str, Any]]:
         if not self.index:
             self.index = pinecone.Index(self.index_name)
+        results = self.index.query(**self._query_kwargs(query_vector, top_k, filters))
+        return self._rank_matches(results, similarity_threshold)
+
+    async def query_batch(self, query_vectors: List[List[float]], top_k: int = 10, filters: Optional[Dict[str, Any]] = None, similarity_threshold: float = 0.7) -> List[List[Dict[str, Any]]]:
+        """Run several queries concurrently; results are returned in the same order as query_vectors."""
+        if not self.index:
+            self.index = pinecone.Index(self.index_name)
+        semaphore = asyncio.Semaphore(QUERY_CONCURRENCY)
+
+        async def query_one(query_vector: List[float]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                results = await asyncio.to_thread(self.index.query, **self._query_kwargs(query_vector, top_k, filters))
+            return self._rank_matches(results, similarity_threshold)
+
+        return await asyncio.gather(*[query_one(v) for v in query_vectors])
+
+    @staticmethod
+    def _query_kwargs(query_vector: List[float], top_k: int, filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         query_kwargs = {
-            "vector": query_vector,
+            "vector": query_vector.tolist() if isinstance(query_vector, np.ndarray) else query_vector,
             "top_k": top_k,
             "include_metadata": True
         }
         if filters:
             query_kwargs["filter"] = filters
-        results = self.index.query(**query_kwargs)
-        # Filter by similarity threshold and rank
-        matches = [m for m in results.matches if m.score >= similarity_threshold]
-        matches.sort(key=lambda x: x.score, reverse=True)
-        logger.info(f"Query returned {len(matches)} results above threshold {similarity_threshold}")
-        return [{"id": m.id, "score": m.score, "metadata": m.metadata} for m in matches]
+        return query_kwargs
+
+    @staticmethod
+    def _rank_matches(results, similarity_threshold: float) -> List[Dict[str, Any]]:
+        # Filter by similarity threshold and rank; scores are pulled once into an array
+        # (float64 so the threshold comparison matches the raw Python floats)
+        matches = results.matches
+        scores = np.fromiter((m.score for m in matches), dtype=np.float64, count=len(matches))
+        keep = np.flatnonzero(scores >= similarity_threshold)
+        order = keep[np.argsort(-scores[keep], kind="stable")]
+        logger.info(f"Query returned {len(order)} results above threshold {similarity_threshold}")
+        return [{"id": matches[i].id, "score": matches[i].score, "metadata": matches[i].metadata} for i in order.tolist()]
 
     async def delete(self, ids: List[str]):
         if not self.index:
@@ -64,16 +108,27 @@ class PineconeManager:
         logger.info(f"Deleted {len(ids)} vectors from index {self.index_name}")
 
     async def backup_index(self, backup_path: str):
-        """Backup index metadata and IDs (not embeddings)."""
+        """Backup index metadata and IDs (not embeddings) as JSON lines: {"id": ..., "metadata": ...}."""
         if not self.index:
             self.index = pinecone.Index(self.index_name)
-        stats = self.index.describe_index_stats()
-        ids = list(stats['namespaces']['']['vector_count'])
-        with open(backup_path, 'w', encoding='utf-8') as f:
-            for id in ids:
-                meta = self.index.fetch([id]).vectors[id].metadata
-                f.write(f"{id}\t{meta}\n")
-        logger.info(f"Backed up index metadata to {backup_path}")
+        # list() pages through every vector id; re-slice so each fetch carries FETCH_BATCH_SIZE ids
+        ids = [id for page in self.index.list() for id in page]
+        batches = [ids[i:i+FETCH_BATCH_SIZE] for i in range(0, len(ids), FETCH_BATCH_SIZE)]
+        # The client is blocking, so fan the fetches out to threads instead of stalling the loop
+        responses = await asyncio.gather(
+            *[asyncio.to_thread(self.index.fetch, batch) for batch in batches],
+            return_exceptions=True
+        )
+        written = 0
+        with open(backup_path, 'wb') as f:
+            for batch, resp in zip(batches, responses):
+                if isinstance(resp, Exception):
+                    logger.error(f"Failed to fetch {len(batch)} ids for backup: {resp}")
+                    continue
+                for id, vector in resp.vectors.items():
+                    f.write(orjson.dumps({"id": id, "metadata": vector.metadata}) + b"\n")
+                    written += 1
+        logger.info(f"Backed up metadata for {written} vectors to {backup_path}")
 
     async def restore_index(self, backup_path: str):
         """Restore index metadata from backup (stub, as embeddings are not stored)."""
@@ -1,4 +1,5 @@
 import asyncio
+import logging
 import os
 import random
 from rag_system.vector_store import PineconeManager
@@ -29,6 +30,13 @@ async def test_pinecone_manager():
     print(f"Query results: {results}")
     assert len(results) > 0
 
+    # Batch query: one result list per vector, in input order, each led by its own vector
+    batch_vectors = [v["embedding"] for v in vectors[:3]]
+    batch_results = await manager.query_batch(batch_vectors, top_k=5, filters={"location": "Berlin"}, similarity_threshold=0.0)
+    assert len(batch_results) == len(batch_vectors)
+    for vec, res in zip(vectors[:3], batch_results):
+        assert res and res[0]["id"] == vec["id"]
+
     # Delete
     ids_to_delete = [vectors[0]["id"]]
     await manager.delete(ids_to_delete)
@@ -43,4 +51,9 @@ async def test_pinecone_manager():
     await manager.close()
 
 if __name__ == "__main__":
+    try:
+        import logging_config  # Ensures logging is configured
+    except ImportError:
+        # Running outside the project root (e.g. the standalone rag_system image)
+        logging.basicConfig(level=logging.INFO)
     asyncio.run(test_pinecone_manager())
@@ -1,7 +1,8 @@
 import os
-import requests
+import aiohttp
+import orjson
 import logging
-from typing import Any, Text, Dict, List
+from typing import Any, Text, Dict, List, Optional
 
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
@@ -10,31 +11,63 @@ from rasa_sdk.events import SlotSet, FollowupAction
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=3)
+
+# API keys and endpoints are resolved once at import rather than on every action call
+OPENWEATHER_KEY = os.getenv("OPENWEATHER_API_KEY")
+GOOGLE_PLACES_KEY = os.getenv("GOOGLE_PLACES_API_KEY")
+OPENWEATHER_URL = "http://api.openweathermap.org/data/2.5/weather"
+PLACES_TEXTSEARCH_URL = "https://maps.googleapis.com/maps/api/place/textsearch/json"
+
+# One pooled keep-alive session shared by every action, so repeat calls skip the TCP/TLS handshake.
+# Actions run as coroutines on the action server's event loop, so API calls no longer block it.
+_session: Optional[aiohttp.ClientSession] = None
+
+def get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300),
+            timeout=REQUEST_TIMEOUT,
+        )
+    return _session
+
+async def fetch_json(url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # params are URL-encoded by aiohttp, so locations like "New York" are sent correctly
+    async with get_session().get(url, params=params) as response:
+        # orjson parses the raw body directly; the Places/OpenWeather content type is not checked
+        return orjson.loads(await response.read())
+
 AMBIGUOUS_LOCATIONS = {
     "london": ["London, UK", "London, Ontario, Canada"],
     "washington": ["Washington, D.C., USA", "Washington State, USA"],
     "cambridge": ["Cambridge, UK", "Cambridge, Massachusetts, USA"]
 }
+# lowercased name -> {"options": [...], "text": "- option\n- option"}, formatted once at import
+AMBIGUOUS_LOCATION_PROMPTS = {
+    name.lower(): {"options": options, "text": "\n".join(f"- {opt}" for opt in options)}
+    for name, options in AMBIGUOUS_LOCATIONS.items()
+}
 
 # --- TOOL 1: Weather ---
 class ActionGetWeather(Action):
     def name(self) -> Text:
         return "action_get_weather"
 
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict) -> List[Dict]:
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict) -> List[Dict]:
         location = tracker.get_slot("trip_destination")
         if not location:
             dispatcher.utter_message(response="utter_ask_location")
             return []
        
-        api_key = os.getenv("OPENWEATHER_API_KEY")
-        if not api_key:
+        if not OPENWEATHER_KEY:
             dispatcher.utter_message(response="utter_api_error")
             return [SlotSet("trip_destination", None)]
 
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={location}&appid={api_key}&units=metric"
         try:
-            response = requests.get(url).json()
+            response = await fetch_json(
+                OPENWEATHER_URL, params={"q": location, "appid": OPENWEATHER_KEY, "units": "metric"}
+            )
             if response.get("cod") != 200:
                 dispatcher.utter_message(response="utter_api_error")
                 return [SlotSet("trip_destination", None)]
@@ -56,7 +89,7 @@ class ActionFindPlaces(Action):
     def name(self) -> Text:
         return "action_find_places"
 
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict) -> List[Dict]:
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict) -> List[Dict]:
         location = tracker.get_slot("trip_destination")
         place_type = tracker.get_slot("place_type")
         preference = tracker.get_slot("user_preference")
@@ -68,21 +101,19 @@ class ActionFindPlaces(Action):
             dispatcher.utter_message(response="utter_ask_place_type", trip_destination=location)
             return []
 
-        api_key = os.getenv("GOOGLE_PLACES_API_KEY")
-        if not api_key:
+        if not GOOGLE_PLACES_KEY:
             dispatcher.utter_message(response="utter_api_error")
             return [SlotSet("trip_destination", None)]
            
-        query = f"{preference or ''} {place_type} in {location}".strip()
-        url = f"https://maps.googleapis.com/maps/api/place/textsearch/json?query={query}&key={api_key}"
+        query = " ".join(filter(None, [preference, place_type, "in", location]))
         try:
-            response = requests.get(url).json()
-            results = response.get("results", [])
-            if not results:
+            response = await fetch_json(PLACES_TEXTSEARCH_URL, params={"query": query, "key": GOOGLE_PLACES_KEY})
+            top_results = response.get("results", ())[:3]
+            if not top_results:
                 dispatcher.utter_message(response="utter_no_places_found", location=location, place_type=place_type)
                 return [SlotSet("user_preference", None)]
 
-            places_list = "\n".join([f"📍 **{p.get('name')}** (Rating: {p.get('rating', 'N/A')} ⭐)" for p in results[:3]])
+            places_list = "\n".join(f"📍 **{p.get('name')}** (Rating: {p.get('rating', 'N/A')} ⭐)" for p in top_results)
             dispatcher.utter_message(response="utter_places_report", location=location, place_type=place_type, places_list=places_list)
             dispatcher.utter_message(response="utter_suggest_after_places", trip_destination=location)
         except Exception as e:
@@ -98,11 +129,10 @@ class ActionDisambiguateLocation(Action):
 
     def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict) -> List[Dict]:
         location = next(tracker.get_latest_entity_values("location"), None)
-        if location and location.lower() in AMBIGUOUS_LOCATIONS:
-            options = AMBIGUOUS_LOCATIONS[location.lower()]
-            options_text = "\n".join([f"- {opt}" for opt in options])
-            dispatcher.utter_message(response="utter_clarify_location", disambiguation_options=options_text)
-            return [SlotSet("disambiguation_options", options)]
+        entry = AMBIGUOUS_LOCATION_PROMPTS.get(location.lower()) if location else None
+        if entry:
+            dispatcher.utter_message(response="utter_clarify_location", disambiguation_options=entry["text"])
+            return [SlotSet("disambiguation_options", entry["options"])]
        
         # If not ambiguous, just proceed to find the place
         return [FollowupAction("action_find_places")]
\ No newline at end of file
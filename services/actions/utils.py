@@ -1,9 +1,37 @@
-from typing import Any, Text, Optional
+from typing import Any, Callable, Dict, Text, Optional
 from rasa_sdk import Tracker
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _is_str(value: Any) -> bool:
+    return isinstance(value, str)
+
+# slot name -> validator; slots without an entry only need a non-None value
+_VALIDATORS: Dict[Text, Callable[[Any], bool]] = {
+    "location": _is_str,
+    "date": _is_str,
+}
+
+def entity_map(tracker: Tracker) -> Dict[Text, Any]:
+    """
+    Maps entity name -> value for the latest user message, built once and cached on the tracker.
+    Args:
+        tracker (Tracker): The Rasa tracker object.
+    Returns:
+        Dict[Text, Any]: First value seen for each entity name.
+    """
+    latest_message = tracker.latest_message or {}
+    cached = getattr(tracker, "_entity_map", None)
+    # Keyed on the message object so a tracker reused across turns is re-indexed
+    if cached is not None and cached[0] is latest_message:
+        return cached[1]
+    entities: Dict[Text, Any] = {}
+    for entity in latest_message.get("entities", []):
+        entities.setdefault(entity.get("entity"), entity.get("value"))
+    tracker._entity_map = (latest_message, entities)
+    return entities
+
 def extract_entity(tracker: Tracker, entity_name: Text) -> Optional[Any]:
     """
     Extracts the value of an entity from the latest user message.
@@ -13,13 +41,7 @@ def extract_entity(tracker: Tracker, entity_name: Text) -> Optional[Any]:
     Returns:
         Optional[Any]: The value of the entity if found, else None.
     """
-    try:
-        for entity in tracker.latest_message.get("entities", []):
-            if entity.get("entity") == entity_name:
-                return entity.get("value")
-    except Exception as e:
-        logger.error(f"Failed to extract entity '{entity_name}': {e}")
-    return None
+    return entity_map(tracker).get(entity_name)
 
 def validate_slot_value(slot_name: Text, value: Any) -> bool:
     """
@@ -32,10 +54,6 @@ def validate_slot_value(slot_name: Text, value: Any) -> bool:
     """
     if value is None:
         return False
-    # Add custom validation logic for each slot as needed
-    if slot_name == "location" and not isinstance(value, str):
-        return False
-    if slot_name == "date" and not isinstance(value, str):
-        return False
-    # Extend with more slot-specific validation as needed
-    return True
+    # Extend _VALIDATORS with more slot-specific validation as needed
+    validator = _VALIDATORS.get(slot_name)
+    return validator(value) if validator is not None else True
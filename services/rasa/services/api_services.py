@@ -1,15 +1,223 @@
 # rasa_bot/services/api_services.py
 import os
+import asyncio
+import atexit
+import bisect
 import logging
-import requests
-from typing import Dict, Any, List
+import re
+import time
+import threading
+import httpx
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Hashable, Tuple
 from datetime import datetime
-from tenacity import retry, stop_after_attempt, wait_exponential
+from cachetools import TTLCache
 from dotenv import load_dotenv
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+REQUEST_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+TRANSPORT_RETRIES = 3  # connection-level retries (connect errors/timeouts)
+BREAKER_FAILURE_THRESHOLD = 5  # consecutive upstream failures before an API is short-circuited
+BREAKER_RESET_SECONDS = 30.0
+
+# Cache policy per endpoint: entries are served fresh for *_TTL seconds, then kept until *_STALE_TTL
+# as a last-known-good copy that is only returned (marked "stale": True) when the upstream call fails
+WEATHER_CACHE_TTL = 600  # seconds; current conditions + 24h forecast
+WEATHER_STALE_TTL = 3600
+EMISSIONS_CACHE_TTL = 24 * 3600  # emission factors change rarely
+EMISSIONS_STALE_TTL = 7 * 24 * 3600
+
+_KEY_SEPARATORS_RE = re.compile(r"[\W_]+")
+
+# Temperature buckets for weather recommendations: < 5, < 15, < 25, and everything warmer
+_TEMP_THRESHOLDS = (5, 15, 25)
+_TEMP_RECS = (
+    (
+        "Pack warm, layered clothing",
+        "Consider indoor sustainable activities",
+        "Hot drinks from local cafes reduce energy consumption",
+    ),
+    (
+        "Perfect weather for hiking and outdoor exploration",
+        "Ideal for walking tours and cycling",
+        "Layer clothing for temperature changes",
+    ),
+    (
+        "Excellent weather for most outdoor activities",
+        "Great for walking and public transportation",
+        "Perfect for exploring local markets",
+    ),
+    (
+        "Stay hydrated and seek shade during peak hours",
+        "Early morning and evening activities recommended",
+        "Use sun protection and light clothing",
+    ),
+)
+
+# Static part of every Climatiq emission_factor; payloads only add activity_id and parameters
+_EMISSION_FACTOR_BASE = {"source": "climatiq", "region": "global", "year": 2023}
+
+# emission type -> (base tip, co2_kg threshold, extra tip above the threshold)
+_EMISSION_RECS = {
+    "flight": (
+        "Consider direct flights to reduce emissions",
+        500,
+        "Offset emissions via certified carbon offset programs",
+    ),
+    "accommodation": (
+        "Choose eco-certified or green hotels",
+        100,
+        "Limit stays in luxury hotels to reduce footprint",
+    ),
+}
+
+
+# (epoch second, ISO string) for _now_iso; a racing thread can only write the same pair for that second
+_iso_now: Tuple[int, str] = (0, "")
+
+
+def _now_iso() -> str:
+    """Second-resolution local ISO timestamp, formatted at most once per second"""
+    global _iso_now
+    now = int(time.time())
+    if _iso_now[0] != now:
+        _iso_now = (now, datetime.fromtimestamp(now).isoformat())
+    return _iso_now[1]
+
+
+class _CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failed requests and short-circuits calls
+    until `reset_after` seconds pass; the next call then probes upstream again.
+    """
+
+    def __init__(self, threshold: int, reset_after: float):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.failures < self.threshold:
+            return True
+        return time.monotonic() - self.opened_at >= self.reset_after
+
+    def record_success(self):
+        self.failures = 0
+
+    def record_failure(self, error: Exception):
+        # Client errors (bad location, bad request) say nothing about upstream health;
+        # undecodable bodies (ValueError) do count
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            if status < 500 and status != 429:
+                return
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+_weather_breaker = _CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+_climatiq_breaker = _CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+
+
+def _cache_token(text: str) -> str:
+    """Canonical cache-key form: "New York, NY", " new-york ny" and "NEW YORK NY" share one entry"""
+    return _KEY_SEPARATORS_RE.sub(" ", text).strip().casefold()
+
+
+class _LockedTTLCache:
+    """
+    TTLCache guarded by a lock; the Rasa action server calls services from multiple threads.
+    Entries are fresh for `ttl` seconds and retained until `stale_ttl` for fallback-on-error.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, stale_ttl: float):
+        self.ttl = ttl
+        # key -> (fresh_until, value); the TTLCache itself evicts at the hard (stale) expiry
+        self._cache = TTLCache(maxsize=maxsize, ttl=stale_ttl, timer=time.monotonic)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Fresh value, or None once the entry is past its soft TTL"""
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def get_stale(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Last known good value (fresh or stale) marked "stale", for use when the upstream call failed"""
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is None:
+            return None
+        return {**entry[1], "stale": True}
+
+    def set(self, key: Hashable, value: Dict[str, Any]):
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.ttl, value)
+
+
+# One async client (and HTTP/2 connection pool) for all async service calls; created lazily because
+# its connections are bound to the running event loop
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            timeout=REQUEST_TIMEOUT,
+            transport=httpx.AsyncHTTPTransport(retries=TRANSPORT_RETRIES, http2=True, limits=POOL_LIMITS),
+        )
+    return _async_client
+
+
+async def close_async_client():
+    if _async_client is not None and not _async_client.is_closed:
+        await _async_client.aclose()
+
+
+async def _fetch_json(method: str, url: str, **kwargs) -> Dict[str, Any]:
+    response = await _get_async_client().request(method, url, **kwargs)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+# Module-level sync client, worker pool and caches: the action server may construct the services per
+# request, and per-instance pools/caches would then be thrown away after every call
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+# Current weather and forecast are independent, so they are fetched side by side
+_executor = ThreadPoolExecutor(max_workers=4)
+_weather_cache = _LockedTTLCache(maxsize=512, ttl=WEATHER_CACHE_TTL, stale_ttl=WEATHER_STALE_TTL)
+_emissions_cache = _LockedTTLCache(maxsize=1024, ttl=EMISSIONS_CACHE_TTL, stale_ttl=EMISSIONS_STALE_TTL)
+
+
+def _get_client() -> httpx.Client:
+    """Shared HTTP/2 client: concurrent calls to the same host multiplex over one connection"""
+    global _client
+    with _client_lock:
+        if _client is None or _client.is_closed:
+            # http2/limits live on the transport, since an explicit transport overrides the client's own
+            _client = httpx.Client(
+                timeout=REQUEST_TIMEOUT,
+                transport=httpx.HTTPTransport(retries=TRANSPORT_RETRIES, http2=True, limits=POOL_LIMITS),
+            )
+        return _client
+
+
+@atexit.register
+def close_client():
+    if _client is not None and not _client.is_closed:
+        _client.close()
+
 
 class WeatherService:
     """OpenWeatherMap API integration"""
@@ -19,37 +227,91 @@ class WeatherService:
         self.base_url = os.getenv(
             "OPENWEATHER_BASE_URL", "https://api.openweathermap.org/data/2.5"
         )
+        self._cache = _weather_cache
+        self.executor = _executor
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     def get_weather(self, location: str, days: int = 5) -> Dict[str, Any]:
         """Get weather forecast for a location"""
+        # Only successful lookups are cached, so a missing key or API error is retried next call
+        cache_key = (_cache_token(location), days)
+        if self.api_key and (cached := self._cache.get(cache_key)) is not None:
+            return cached
+        if not _weather_breaker.allow():
+            logger.warning("OpenWeatherMap circuit open, skipping request")
+            return self._weather_fallback(cache_key, location)
         try:
-            # Current weather
-            current_url = f"{self.base_url}/weather"
-            current_params = {"q": location, "appid": self.api_key, "units": "metric"}
+            (current_url, current_params), (forecast_url, forecast_params) = self._weather_requests(location, days)
+
+            client = _get_client()
+            current_future = self.executor.submit(client.get, current_url, params=current_params)
+            forecast_future = self.executor.submit(client.get, forecast_url, params=forecast_params)
 
-            current_response = requests.get(current_url, params=current_params)
+            current_response = current_future.result()
             current_response.raise_for_status()
-            current_data = current_response.json()
-
-            # Forecast
-            forecast_url = f"{self.base_url}/forecast"
-            forecast_params = {
-                "q": location,
-                "appid": self.api_key,
-                "units": "metric",
-                "cnt": days * 8,  # 8 forecasts per day (every 3 hours)
-            }
-
-            forecast_response = requests.get(forecast_url, params=forecast_params)
+            current_data = orjson.loads(current_response.content)
+
+            forecast_response = forecast_future.result()
             forecast_response.raise_for_status()
-            forecast_data = forecast_response.json()
+            forecast_data = orjson.loads(forecast_response.content)
+
+            _weather_breaker.record_success()
+            result = self._format_weather_data(current_data, forecast_data)
+            if self.api_key:
+                self._cache.set(cache_key, result)
+            return result
+
+        except (httpx.HTTPError, ValueError) as e:
+            _weather_breaker.record_failure(e)
+            logger.error(f"Weather API error: {e}")
+            return self._weather_fallback(cache_key, location)
+
+    async def get_weather_async(self, location: str, days: int = 5) -> Dict[str, Any]:
+        """Async get_weather: both OpenWeatherMap calls go out concurrently on the shared async client"""
+        cache_key = (_cache_token(location), days)
+        if self.api_key and (cached := self._cache.get(cache_key)) is not None:
+            return cached
+        if not _weather_breaker.allow():
+            logger.warning("OpenWeatherMap circuit open, skipping request")
+            return self._weather_fallback(cache_key, location)
+        try:
+            (current_url, current_params), (forecast_url, forecast_params) = self._weather_requests(location, days)
+            current_data, forecast_data = await asyncio.gather(
+                _fetch_json("GET", current_url, params=current_params),
+                _fetch_json("GET", forecast_url, params=forecast_params),
+            )
 
-            return self._format_weather_data(current_data, forecast_data)
+            _weather_breaker.record_success()
+            result = self._format_weather_data(current_data, forecast_data)
+            if self.api_key:
+                self._cache.set(cache_key, result)
+            return result
 
-        except requests.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
+            _weather_breaker.record_failure(e)
             logger.error(f"Weather API error: {e}")
-            return {"error": "Unable to fetch weather data", "location": location}
+            return self._weather_fallback(cache_key, location)
+
+    def _weather_fallback(self, cache_key: Tuple, location: str) -> Dict[str, Any]:
+        """Last known good result for this lookup if still retained, else an error payload"""
+        if self.api_key and (stale := self._cache.get_stale(cache_key)) is not None:
+            return stale
+        return {"error": "Unable to fetch weather data", "location": location}
+
+    def _weather_requests(self, location: str, days: int) -> Tuple[Tuple[str, Dict], Tuple[str, Dict]]:
+        """(url, params) for the current weather and forecast calls"""
+        # Current weather
+        current_url = f"{self.base_url}/weather"
+        current_params = {"q": location, "appid": self.api_key, "units": "metric"}
+
+        # Forecast
+        forecast_url = f"{self.base_url}/forecast"
+        forecast_params = {
+            "q": location,
+            "appid": self.api_key,
+            "units": "metric",
+            "cnt": days * 8,  # 8 forecasts per day (every 3 hours)
+        }
+        return (current_url, current_params), (forecast_url, forecast_params)
 
     def _format_weather_data(self, current: Dict, forecast: Dict) -> Dict[str, Any]:
         """Format weather data for travel recommendations"""
@@ -62,8 +324,17 @@ class WeatherService:
         }
 
         # Extract forecast highlights
-        forecast_list = forecast["list"][:8]  # Next 24 hours
-        avg_temp = sum(item["main"]["temp"] for item in forecast_list) / len(forecast_list)
+        forecast_list = forecast["list"]
+        n = min(8, len(forecast_list))  # Next 24 hours
+        # One pass over the first n entries (no slice copy) collects the temperature total and first four conditions
+        temp_total = 0.0
+        conditions = []
+        for i in range(n):
+            item = forecast_list[i]
+            temp_total += item["main"]["temp"]
+            if i < 4:
+                conditions.append(item["weather"][0]["description"])
+        avg_temp = temp_total / n
 
         recommendations = self._get_weather_recommendations(current_weather, avg_temp)
 
@@ -72,49 +343,16 @@ class WeatherService:
             "current": current_weather,
             "forecast_24h": {
                 "average_temp": round(avg_temp, 1),
-                "conditions": [item["weather"][0]["description"] for item in forecast_list[:4]],
+                "conditions": conditions,
             },
             "travel_recommendations": recommendations,
-            "last_updated": datetime.now().isoformat(),
+            "last_updated": _now_iso(),
         }
 
     def _get_weather_recommendations(self, current: Dict, avg_temp: float) -> List[str]:
         """Generate weather-based travel recommendations"""
-        recommendations = []
-        temp = current["temperature"]
-
-        if temp < 5:
-            recommendations.extend(
-                [
-                    "Pack warm, layered clothing",
-                    "Consider indoor sustainable activities",
-                    "Hot drinks from local cafes reduce energy consumption",
-                ]
-            )
-        elif temp < 15:
-            recommendations.extend(
-                [
-                    "Perfect weather for hiking and outdoor exploration",
-                    "Ideal for walking tours and cycling",
-                    "Layer clothing for temperature changes",
-                ]
-            )
-        elif temp < 25:
-            recommendations.extend(
-                [
-                    "Excellent weather for most outdoor activities",
-                    "Great for walking and public transportation",
-                    "Perfect for exploring local markets",
-                ]
-            )
-        else:
-            recommendations.extend(
-                [
-                    "Stay hydrated and seek shade during peak hours",
-                    "Early morning and evening activities recommended",
-                    "Use sun protection and light clothing",
-                ]
-            )
+        # bisect_right keeps the strict "< threshold" bucket boundaries
+        recommendations = list(_TEMP_RECS[bisect.bisect_right(_TEMP_THRESHOLDS, current["temperature"])])
 
         if current["humidity"] > 80:
             recommendations.append("High humidity - choose breathable, quick-dry clothing")
@@ -135,59 +373,150 @@ class CarbonFootprintService:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
+        self._cache = _emissions_cache
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     def calculate_flight_emissions(
         self, origin: str, destination: str, passengers: int = 1, cabin_class: str = "economy"
     ) -> Dict[str, Any]:
         """Calculate flight emissions using Climatiq API"""
+        cache_key = ("flight", _cache_token(origin), _cache_token(destination), passengers, cabin_class)
+        if self.api_key and (cached := self._cache.get(cache_key)) is not None:
+            return cached
+        if not _climatiq_breaker.allow():
+            logger.warning("Climatiq circuit open, skipping request")
+            return self._flight_fallback(cache_key, origin, destination, passengers)
         try:
             url = f"{self.base_url}/estimate"
-            payload = {
-                "emission_factor": {
-                    "activity_id": f"passenger_flight-route_type_domestic-aircraft_type_average-distance_na-class_{cabin_class}",
-                    "source": "climatiq",
-                    "region": "global",
-                    "year": 2023,
-                },
-                "parameters": {"passengers": passengers, "origin": origin, "destination": destination},
-            }
-
-            response = requests.post(url, json=payload, headers=self.headers)
+            payload = self._flight_payload(origin, destination, passengers, cabin_class)
+
+            response = _get_client().post(url, content=payload, headers=self.headers)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
+
+            _climatiq_breaker.record_success()
+            result = self._format_emission_data(data, "flight", origin, destination)
+            if self.api_key:
+                self._cache.set(cache_key, result)
+            return result
+
+        except (httpx.HTTPError, ValueError) as e:
+            _climatiq_breaker.record_failure(e)
+            logger.error(f"Carbon footprint API error: {e}")
+            return self._flight_fallback(cache_key, origin, destination, passengers)
+
+    async def calculate_flight_emissions_async(
+        self, origin: str, destination: str, passengers: int = 1, cabin_class: str = "economy"
+    ) -> Dict[str, Any]:
+        """Async calculate_flight_emissions on the shared async client"""
+        cache_key = ("flight", _cache_token(origin), _cache_token(destination), passengers, cabin_class)
+        if self.api_key and (cached := self._cache.get(cache_key)) is not None:
+            return cached
+        if not _climatiq_breaker.allow():
+            logger.warning("Climatiq circuit open, skipping request")
+            return self._flight_fallback(cache_key, origin, destination, passengers)
+        try:
+            data = await _fetch_json(
+                "POST",
+                f"{self.base_url}/estimate",
+                content=self._flight_payload(origin, destination, passengers, cabin_class),
+                headers=self.headers,
+            )
 
-            return self._format_emission_data(data, "flight", origin, destination)
+            _climatiq_breaker.record_success()
+            result = self._format_emission_data(data, "flight", origin, destination)
+            if self.api_key:
+                self._cache.set(cache_key, result)
+            return result
 
-        except requests.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
+            _climatiq_breaker.record_failure(e)
             logger.error(f"Carbon footprint API error: {e}")
-            return self._estimate_flight_emissions_fallback(origin, destination, passengers)
+            return self._flight_fallback(cache_key, origin, destination, passengers)
 
     def calculate_accommodation_emissions(
         self, location: str, nights: int, hotel_type: str = "average"
     ) -> Dict[str, Any]:
         """Calculate accommodation emissions"""
+        cache_key = ("accommodation", _cache_token(location), nights, hotel_type)
+        if self.api_key and (cached := self._cache.get(cache_key)) is not None:
+            return cached
+        if not _climatiq_breaker.allow():
+            logger.warning("Climatiq circuit open, skipping request")
+            return self._accommodation_fallback(cache_key, nights, hotel_type)
         try:
             url = f"{self.base_url}/estimate"
-            payload = {
-                "emission_factor": {
-                    "activity_id": f"accommodation-type_{hotel_type}",
-                    "source": "climatiq",
-                    "region": "global",
-                    "year": 2023,
-                },
-                "parameters": {"nights": nights, "location": location},
-            }
-
-            response = requests.post(url, json=payload, headers=self.headers)
+            payload = self._accommodation_payload(location, nights, hotel_type)
+
+            response = _get_client().post(url, content=payload, headers=self.headers)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
+
+            _climatiq_breaker.record_success()
+            result = self._format_emission_data(data, "accommodation", location)
+            if self.api_key:
+                self._cache.set(cache_key, result)
+            return result
 
-            return self._format_emission_data(data, "accommodation", location)
+        except (httpx.HTTPError, ValueError) as e:
+            _climatiq_breaker.record_failure(e)
+            logger.error(f"Accommodation emissions error: {e}")
+            return self._accommodation_fallback(cache_key, nights, hotel_type)
+
+    async def calculate_accommodation_emissions_async(
+        self, location: str, nights: int, hotel_type: str = "average"
+    ) -> Dict[str, Any]:
+        """Async calculate_accommodation_emissions on the shared async client"""
+        cache_key = ("accommodation", _cache_token(location), nights, hotel_type)
+        if self.api_key and (cached := self._cache.get(cache_key)) is not None:
+            return cached
+        if not _climatiq_breaker.allow():
+            logger.warning("Climatiq circuit open, skipping request")
+            return self._accommodation_fallback(cache_key, nights, hotel_type)
+        try:
+            data = await _fetch_json(
+                "POST",
+                f"{self.base_url}/estimate",
+                content=self._accommodation_payload(location, nights, hotel_type),
+                headers=self.headers,
+            )
 
-        except requests.RequestException as e:
+            _climatiq_breaker.record_success()
+            result = self._format_emission_data(data, "accommodation", location)
+            if self.api_key:
+                self._cache.set(cache_key, result)
+            return result
+
+        except (httpx.HTTPError, ValueError) as e:
+            _climatiq_breaker.record_failure(e)
             logger.error(f"Accommodation emissions error: {e}")
-            return self._estimate_accommodation_emissions_fallback(nights, hotel_type)
+            return self._accommodation_fallback(cache_key, nights, hotel_type)
+
+    async def calculate_trip_emissions_async(
+        self, origin: str, destination: str, nights: int, passengers: int = 1,
+        cabin_class: str = "economy", hotel_type: str = "average"
+    ) -> Dict[str, Dict[str, Any]]:
+        """Flight and accommodation estimates for one trip, requested concurrently"""
+        flight, accommodation = await asyncio.gather(
+            self.calculate_flight_emissions_async(origin, destination, passengers, cabin_class),
+            self.calculate_accommodation_emissions_async(destination, nights, hotel_type),
+        )
+        return {"flight": flight, "accommodation": accommodation}
+
+    # Payloads are serialized here with orjson and sent as the raw request body with self.headers
+    def _flight_payload(self, origin: str, destination: str, passengers: int, cabin_class: str) -> bytes:
+        return orjson.dumps({
+            "emission_factor": {
+                "activity_id": f"passenger_flight-route_type_domestic-aircraft_type_average-distance_na-class_{cabin_class}",
+                **_EMISSION_FACTOR_BASE,
+            },
+            "parameters": {"passengers": passengers, "origin": origin, "destination": destination},
+        })
+
+    def _accommodation_payload(self, location: str, nights: int, hotel_type: str) -> bytes:
+        return orjson.dumps({
+            "emission_factor": {"activity_id": f"accommodation-type_{hotel_type}", **_EMISSION_FACTOR_BASE},
+            "parameters": {"nights": nights, "location": location},
+        })
 
     def _format_emission_data(self, data: Dict, emission_type: str, location1: str, location2: str = None) -> Dict[str, Any]:
         """Format emission data response"""
@@ -201,9 +530,20 @@ class CarbonFootprintService:
             "equivalent": self._get_emission_equivalent(co2_kg),
             "locations": [location1] + ([location2] if location2 else []),
             "recommendations": recommendations,
-            "calculated_at": datetime.now().isoformat(),
+            "calculated_at": _now_iso(),
         }
 
+    def _flight_fallback(self, cache_key: Tuple, origin: str, destination: str, passengers: int) -> Dict[str, Any]:
+        """Last known good Climatiq result if still retained, else the rough local estimate"""
+        if self.api_key and (stale := self._cache.get_stale(cache_key)) is not None:
+            return stale
+        return self._estimate_flight_emissions_fallback(origin, destination, passengers)
+
+    def _accommodation_fallback(self, cache_key: Tuple, nights: int, hotel_type: str) -> Dict[str, Any]:
+        if self.api_key and (stale := self._cache.get_stale(cache_key)) is not None:
+            return stale
+        return self._estimate_accommodation_emissions_fallback(nights, hotel_type)
+
     def _estimate_flight_emissions_fallback(self, origin: str, destination: str, passengers: int) -> Dict[str, Any]:
         """Fallback flight emissions estimate"""
         base_emission = 0.255  # kg CO2 per km per passenger (rough average)
@@ -217,7 +557,7 @@ class CarbonFootprintService:
             "equivalent": self._get_emission_equivalent(co2_kg),
             "locations": [origin, destination],
             "recommendations": self._get_emission_recommendations(co2_kg, "flight"),
-            "calculated_at": datetime.now().isoformat(),
+            "calculated_at": _now_iso(),
             "note": "Estimated using fallback calculation",
         }
 
@@ -233,7 +573,7 @@ class CarbonFootprintService:
             "equivalent": self._get_emission_equivalent(co2_kg),
             "locations": [hotel_type],
             "recommendations": self._get_emission_recommendations(co2_kg, "accommodation"),
-            "calculated_at": datetime.now().isoformat(),
+            "calculated_at": _now_iso(),
             "note": "Estimated using fallback calculation",
         }
 
@@ -242,21 +582,18 @@ class CarbonFootprintService:
         """Very rough distance estimate in km (stub - replace with geopy or API for accuracy)"""
         return 1000.0  # placeholder for demo purposes
 
-    def _get_emission_equivalent(self, co2_kg: float) -> str:
-        """Provide human-readable equivalents"""
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _get_emission_equivalent(co2_kg: float) -> str:
+        """Provide human-readable equivalents (memoized; fallback estimates repeat the same values)"""
         car_km = round(co2_kg / 0.120, 1)  # avg car emits 120 g/km
         trees = round(co2_kg / 21.77, 1)  # one tree absorbs ~21.77 kg CO2/year
         return f"{car_km} km driven by car, or {trees} trees absorbing CO2 for a year"
 
     def _get_emission_recommendations(self, co2_kg: float, emission_type: str) -> List[str]:
         """Suggest sustainability tips"""
-        recs = []
-        if emission_type == "flight":
-            recs.append("Consider direct flights to reduce emissions")
-            if co2_kg > 500:
-                recs.append("Offset emissions via certified carbon offset programs")
-        elif emission_type == "accommodation":
-            recs.append("Choose eco-certified or green hotels")
-            if co2_kg > 100:
-                recs.append("Limit stays in luxury hotels to reduce footprint")
-        return recs
+        entry = _EMISSION_RECS.get(emission_type)
+        if entry is None:
+            return []
+        base, threshold, extra = entry
+        return [base, extra] if co2_kg > threshold else [base]
@@ -1,23 +1,246 @@
 # rasa_bot/services/langchain_service.py
 import os
+import re
+import json
+import asyncio
+import hashlib
+import functools
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, AsyncIterator, Optional, Set, Tuple
 from langchain.embeddings import HuggingFaceEmbeddings
+from langchain.embeddings.base import Embeddings
 from langchain.vectorstores import Pinecone as PineconeVectorStore
 from langchain.llms import HuggingFacePipeline
-from langchain.chains import RetrievalQA, ConversationalRetrievalChain
-from langchain.memory import ConversationBufferWindowMemory
+from langchain.chains import RetrievalQA, ConversationalRetrievalChain, LLMChain
 from langchain.prompts import PromptTemplate
-from langchain.schema import Document
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+from langchain.schema import Document, BaseRetriever
+from transformers import (
+    AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig, StoppingCriteria, StoppingCriteriaList,
+    TextIteratorStreamer, pipeline
+)
 import pinecone
+import redis.asyncio
 from sentence_transformers import SentenceTransformer
 import torch
+import numpy as np
 from dotenv import load_dotenv
+from utils.query_cache import QueryCache
+from utils.chat_history import TokenBudgetChatHistory
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# When enabled, generation goes to a vLLM OpenAI-compatible server (`vllm serve <model>`), which schedules
+# concurrent requests into shared batches (continuous batching, PagedAttention KV cache) instead of running
+# one prompt at a time through an in-process transformers pipeline
+VLLM_ENABLED = os.getenv('VLLM_ENABLED', 'false').lower() == 'true'
+VLLM_BASE_URL = os.getenv('VLLM_BASE_URL', 'http://localhost:8000/v1')
+
+# Weight quantization for the local Hugging Face LLM (GPU only): nf4 (bitsandbytes 4-bit, ~4 GB for 7B),
+# int8, awq (pre-quantized LLM_AWQ_MODEL checkpoint) or none. Freed GPU memory goes to the KV cache.
+# A vLLM server picks its quantization at launch (`vllm serve <awq model> --quantization awq`).
+LLM_QUANT = os.getenv('LLM_QUANT', 'nf4').lower()
+LLM_AWQ_MODEL = os.getenv('LLM_AWQ_MODEL', 'TheBloke/Llama-2-7B-Chat-AWQ')
+
+# Answers for repeated (question, user_context) pairs are served from memory for QUERY_CACHE_TTL seconds
+QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', '2000'))
+QUERY_CACHE_TTL = float(os.getenv('QUERY_CACHE_TTL', '300'))
+
+# Conversation history: per-sender Redis lists, newest MAX_HISTORY_TURNS turns, at most MAX_HISTORY_TOKENS
+# LLM tokens of it fed back into the prompt, expiring HISTORY_TTL seconds after the sender's last turn
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+MAX_HISTORY_TURNS = int(os.getenv('MAX_HISTORY_TURNS', '10'))
+MAX_HISTORY_TOKENS = int(os.getenv('MAX_HISTORY_TOKENS', '1500'))
+HISTORY_TTL = int(os.getenv('HISTORY_TTL', str(24 * 3600)))
+# Seconds before a history read/write gives up, so an unreachable Redis degrades to no history instead of hanging
+REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', '1.0'))
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', '1.0'))
+
+# HNSW graph parameters for the in-memory FAISS fallback store
+FAISS_HNSW_M = 32
+FAISS_EF_CONSTRUCTION = 200
+FAISS_EF_SEARCH = int(os.getenv('FAISS_EF_SEARCH', '64'))
+# Vector storage in the HNSW index: fp16 (half the memory of float32), 8bit (a quarter) or none (float32)
+FAISS_SQ = os.getenv('FAISS_SQ', 'fp16').lower()
+
+# Concurrent async retrievals arriving within this window share one embed + index search
+RETRIEVAL_BATCH_DELAY = float(os.getenv('RETRIEVAL_BATCH_DELAY', '0.01'))
+
+# EMBED_COMPILE=1 compiles the embedding transformer with torch.compile at startup; warm-up encodes
+# at these token lengths so live requests don't stall on (re)compilation
+EMBED_COMPILE = os.getenv('EMBED_COMPILE', '0') == '1'
+EMBED_WARMUP_LENGTHS = (64, 128, 256)
+
+QUERY_EMBEDDING_CACHE_SIZE = 4096  # normalized query text -> embedding
+
+# Follow-ups that lean on earlier turns; only these go through the condense-question LLM call
+_FOLLOW_UP_RE = re.compile(
+    r"\b(it|its|there|they|them|their|this|that|these|those|he|she|him|her|same|above|previous|earlier)\b",
+    re.IGNORECASE
+)
+
+# Room left for the rephrased question when sizing the retrieved context to the model's window
+QUESTION_TOKEN_RESERVE = 256
+
+# Custom prompt for sustainable travel, built once at import. Kept unindented so the static
+# instructions don't spend prompt tokens on leading whitespace every call.
+RAG_PROMPT_TEMPLATE = """You are an expert sustainable travel advisor with deep knowledge of eco-friendly tourism, carbon footprint reduction, and responsible travel practices.
+
+Context information:
+{context}
+
+Chat History:
+{chat_history}
+
+Human: {question}
+
+Please provide helpful, accurate, and actionable advice focusing on:
+- Sustainable travel options and eco-friendly practices
+- Carbon footprint reduction strategies
+- Local community support and responsible tourism
+- Environmental conservation during travel
+- Budget-conscious sustainable travel tips
+
+If the question is not related to travel or sustainability, politely redirect the conversation back to sustainable travel topics.
+
+Assistant:"""
+RAG_PROMPT = PromptTemplate(
+    template=RAG_PROMPT_TEMPLATE,
+    input_variables=["context", "chat_history", "question"]
+)
+
+# (user_context key, phrase) pairs for _enhance_question, in the order they're listed
+_USER_CONTEXT_PHRASES = (
+    ("destination", "traveling to {}"),
+    ("budget", "with a budget of {}"),
+    ("duration", "for {}"),
+)
+
+# EMBEDDING_DTYPE values accepted as an override; "auto" picks per device (see _embedding_dtype)
+_TORCH_DTYPES = {'float32': torch.float32, 'float16': torch.float16, 'bfloat16': torch.bfloat16}
+
+def _cpu_has_bf16() -> bool:
+    """True on CPUs with native BF16 math (Intel AMX / AVX512-BF16, Arm BF16); elsewhere BF16 is slower than FP32"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = set(f.read().split())
+    except OSError:
+        return False
+    return bool(flags & {'amx_bf16', 'avx512_bf16', 'bf16'})
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Embeddings wrapper with an LRU cache of query vectors keyed by the case/whitespace-normalized
+    text, so repeated or re-condensed questions are not run through the encoder again.
+    """
+    def __init__(self, base: Embeddings, max_size: int = QUERY_EMBEDDING_CACHE_SIZE):
+        self.base = base
+        self.max_size = max_size
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(text: str) -> str:
+        return " ".join(text.lower().split())
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+    
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Query vectors for several texts; cache misses are encoded together in one batch"""
+        keys = [self._key(text) for text in texts]
+        with self._lock:
+            found = {key: self._cache[key] for key in keys if key in self._cache}
+            for key in found:
+                self._cache.move_to_end(key)
+        misses = {key: text for key, text in zip(keys, texts) if key not in found}
+        if misses:
+            vectors = self.base.embed_documents(list(misses.values()))
+            with self._lock:
+                for key, vector in zip(misses, vectors):
+                    self._cache[key] = found[key] = vector
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+        # Copies, so callers can't mutate cached vectors
+        return [list(found[key]) for key in keys]
+
+class _FollowUpQuestionGenerator(LLMChain):
+    """Condense-question step that only calls the LLM when the question refers back to earlier turns"""
+    def run(self, *args, **kwargs):
+        question = kwargs.get("question", "")
+        if not _FOLLOW_UP_RE.search(question):
+            return question
+        return super().run(*args, **kwargs)
+    
+    async def arun(self, *args, **kwargs):
+        question = kwargs.get("question", "")
+        if not _FOLLOW_UP_RE.search(question):
+            return question
+        return await super().arun(*args, **kwargs)
+
+class _StopOnEvent(StoppingCriteria):
+    """Ends generate() early once the streaming consumer has gone away, freeing the GPU for other requests"""
+    def __init__(self, event: threading.Event):
+        self.event = event
+    
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return self.event.is_set()
+
+class BatchedFAISSRetriever(BaseRetriever):
+    """
+    Retriever for the in-memory FAISS store that coalesces concurrent async lookups: the first query
+    of a batch starts a flush task that waits RETRIEVAL_BATCH_DELAY, then every query queued by then
+    is embedded in one batch (cached query vectors are reused) and searched with one index.search
+    over the stacked vectors. The flush runs in its own task so a cancelled caller never strands the batch.
+    """
+    vectorstore: Any
+    embeddings: Any
+    k: int = 5
+    pending: List[Any] = []
+    flushers: Set[Any] = set()
+    
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return self._search_many([query])[0]
+    
+    async def _aget_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((query, future))
+        if len(self.pending) == 1:
+            task = asyncio.create_task(self._flush())
+            self.flushers.add(task)
+            task.add_done_callback(self.flushers.discard)
+        return await future
+    
+    async def _flush(self):
+        await asyncio.sleep(RETRIEVAL_BATCH_DELAY)
+        batch, self.pending = self.pending, []
+        try:
+            results = await asyncio.to_thread(self._search_many, [q for q, _ in batch])
+        except Exception as e:
+            for _, waiter in batch:
+                # Callers cancelled while the batch was in flight already have a done future
+                if not waiter.done():
+                    waiter.set_exception(e)
+        else:
+            for (_, waiter), docs in zip(batch, results):
+                if not waiter.done():
+                    waiter.set_result(docs)
+    
+    def _search_many(self, queries: List[str]) -> List[List[Document]]:
+        store = self.vectorstore
+        vectors = np.asarray(self.embeddings.embed_queries(queries), dtype='float32')
+        _, indices = store.index.search(vectors, self.k)
+        return [
+            [store.docstore.search(store.index_to_docstore_id[i]) for i in row if i != -1]
+            for row in indices
+        ]
+
 class SustainableTravelRAGService:
     """Enhanced RAG service for sustainable travel recommendations"""
     
@@ -26,26 +249,38 @@ class SustainableTravelRAGService:
         self.vectorstore = None
         self.llm = None
         self.qa_chain = None
-        self.memory = ConversationBufferWindowMemory(
-            k=10,
-            memory_key="chat_history",
-            return_messages=True
+        self.tokenizer = None
+        self.context_token_budget = None
+        self.chat_history = TokenBudgetChatHistory(
+            redis.asyncio.Redis.from_url(
+                REDIS_URL,
+                socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+                socket_timeout=REDIS_SOCKET_TIMEOUT
+            ),
+            self._count_tokens,
+            max_turns=MAX_HISTORY_TURNS,
+            max_tokens=MAX_HISTORY_TOKENS,
+            ttl=HISTORY_TTL
         )
+        self.query_cache = QueryCache(max_size=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
         self._initialize_components()
     
     def _initialize_components(self):
         """Initialize all RAG components"""
         try:
-            # Initialize embeddings
-            self._init_embeddings()
-            # Initialize vector store
-            self._init_vectorstore()
-            # Initialize LLM
-            self._init_llm()
+            # The LLM (the slowest part: a multi-GB download/load) initializes on a worker thread
+            # while embeddings and the vector store connection are set up here
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-init") as executor:
+                llm_ready = executor.submit(self._init_llm)
+                # Initialize embeddings
+                self._init_embeddings()
+                # Initialize vector store
+                self._init_vectorstore()
+                llm_ready.result()
+            # Load sustainable travel knowledge (creates the FAISS store when there is no Pinecone index)
+            self._load_travel_knowledge()
             # Initialize QA chain
             self._init_qa_chain()
-            # Load sustainable travel knowledge
-            self._load_travel_knowledge()
             
             logger.info("SustainableTravelRAGService initialized successfully")
             
@@ -61,9 +296,44 @@ class SustainableTravelRAGService:
         self.embedding_model = HuggingFaceEmbeddings(
             model_name=model_name,
             model_kwargs={'device': device},
-            encode_kwargs={'normalize_embeddings': True}
+            # embed_documents sends all texts through encode() together, in forward passes of batch_size
+            encode_kwargs={
+                'normalize_embeddings': True,
+                'batch_size': int(os.getenv('EMBEDDING_BATCH_SIZE', '64'))
+            }
         )
-        logger.info(f"Embeddings initialized with model: {model_name}")
+        # Half-precision weights halve memory traffic for the BERT-style encoder; INT8 dynamic
+        # quantization is deliberately not used since it degrades embedding fidelity
+        dtype = self._embedding_dtype(device)
+        if dtype is not torch.float32:
+            self.embedding_model.client.to(dtype)
+        if EMBED_COMPILE:
+            self._compile_embeddings()
+        self.embedding_model = CachedQueryEmbeddings(self.embedding_model)
+        logger.info(f"Embeddings initialized with model: {model_name} ({dtype})")
+    
+    def _compile_embeddings(self):
+        """Swap the SentenceTransformer's Hugging Face module for a torch.compile'd one; eager on failure"""
+        transformer_module = self.embedding_model.client[0]
+        eager_model = transformer_module.auto_model
+        try:
+            transformer_module.auto_model = torch.compile(eager_model, backend="inductor", dynamic=True)
+            for length in EMBED_WARMUP_LENGTHS:
+                # One token per word, plus [CLS]/[SEP]
+                self.embedding_model.embed_documents([" ".join(["travel"] * (length - 2))])
+            logger.info(f"Embedding model compiled, warmed up at {EMBED_WARMUP_LENGTHS} tokens")
+        except Exception as e:
+            transformer_module.auto_model = eager_model
+            logger.warning(f"torch.compile failed, keeping eager embedding model: {e}")
+    
+    def _embedding_dtype(self, device: str) -> torch.dtype:
+        """EMBEDDING_DTYPE override, else FP16 on GPU, BF16 on BF16-capable CPUs and FP32 otherwise"""
+        requested = os.getenv('EMBEDDING_DTYPE', 'auto').lower()
+        if requested in _TORCH_DTYPES:
+            return _TORCH_DTYPES[requested]
+        if device.startswith('cuda'):
+            return torch.float16
+        return torch.bfloat16 if _cpu_has_bf16() else torch.float32
     
     def _init_vectorstore(self):
         """Initialize Pinecone vector store"""
@@ -85,10 +355,13 @@ class SustainableTravelRAGService:
                 dimension = int(os.getenv('PINECONE_DIMENSION', '384'))
                 metric = os.getenv('PINECONE_METRIC', 'cosine')
                 
+                # PINECONE_POD_TYPE=s1.x1 picks storage-optimized pods when memory matters more than QPS
+                pod_type = os.getenv('PINECONE_POD_TYPE')
                 pinecone.create_index(
                     name=index_name,
                     dimension=dimension,
-                    metric=metric
+                    metric=metric,
+                    **({"pod_type": pod_type} if pod_type else {})
                 )
                 logger.info(f"Created new Pinecone index: {index_name}")
             
@@ -105,9 +378,18 @@ class SustainableTravelRAGService:
             self.vectorstore = None
     
     def _init_llm(self):
-        """Initialize Hugging Face LLM"""
+        """Initialize the LLM: vLLM server if VLLM_ENABLED, else a local Hugging Face pipeline"""
         model_name = os.getenv('HUGGINGFACE_MODEL', 'meta-llama/Llama-2-7b-chat-hf')
         
+        if VLLM_ENABLED:
+            try:
+                self.llm = self._init_vllm(model_name)
+                self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+                logger.info(f"LLM served by vLLM at {VLLM_BASE_URL} with model: {model_name}")
+                return
+            except Exception as e:
+                logger.error(f"Failed to initialize vLLM backend, falling back to Hugging Face pipeline: {e}")
+        
         try:
             # Check if CUDA is available
             device = 0 if torch.cuda.is_available() else -1
@@ -116,16 +398,20 @@ class SustainableTravelRAGService:
             tokenizer = AutoTokenizer.from_pretrained(model_name)
             if tokenizer.pad_token is None:
                 tokenizer.pad_token = tokenizer.eos_token
+            self.tokenizer = tokenizer
+            
+            # Quantized models are already placed on the GPU by device_map, so the pipeline gets no device
+            quantized_model = self._load_quantized_llm(model_name)
+            placement = {"model": quantized_model} if quantized_model is not None else {"model": model_name, "device": device}
             
             # Create text generation pipeline
             text_gen_pipeline = pipeline(
                 "text-generation",
-                model=model_name,
                 tokenizer=tokenizer,
                 max_length=int(os.getenv('MODEL_MAX_LENGTH', '4096')),
                 temperature=float(os.getenv('TEMPERATURE', '0.7')),
                 do_sample=True,
-                device=device
+                **placement
             )
             
             self.llm = HuggingFacePipeline(
@@ -151,52 +437,88 @@ class SustainableTravelRAGService:
             except:
                 raise Exception("No LLM available")
     
-    def _init_qa_chain(self):
-        """Initialize QA chain with custom prompt"""
+    def _load_quantized_llm(self, model_name: str):
+        """Model loaded per LLM_QUANT, or None to let the pipeline load full-precision weights"""
+        if LLM_QUANT == 'none':
+            return None
+        if LLM_QUANT not in ('nf4', 'int8', 'awq'):
+            logger.warning(f"Unknown LLM_QUANT={LLM_QUANT}; loading full-precision weights")
+            return None
+        if not torch.cuda.is_available():
+            logger.warning(f"LLM_QUANT={LLM_QUANT} needs a CUDA GPU; loading full-precision weights")
+            return None
         
-        # Custom prompt for sustainable travel
-        prompt_template = """
-        You are an expert sustainable travel advisor with deep knowledge of eco-friendly tourism, carbon footprint reduction, and responsible travel practices.
-        
-        Context information:
-        {context}
-        
-        Chat History:
-        {chat_history}
-        
-        Human: {question}
-        
-        Please provide helpful, accurate, and actionable advice focusing on:
-        - Sustainable travel options and eco-friendly practices
-        - Carbon footprint reduction strategies
-        - Local community support and responsible tourism
-        - Environmental conservation during travel
-        - Budget-conscious sustainable travel tips
-        
-        If the question is not related to travel or sustainability, politely redirect the conversation back to sustainable travel topics.
-        
-        Assistant:"""
-        
-        PROMPT = PromptTemplate(
-            template=prompt_template,
-            input_variables=["context", "chat_history", "question"]
+        if LLM_QUANT == 'awq':
+            # The AWQ quantization config ships with the checkpoint
+            model = AutoModelForCausalLM.from_pretrained(LLM_AWQ_MODEL, device_map="auto")
+        else:
+            if LLM_QUANT == 'int8':
+                config = BitsAndBytesConfig(load_in_8bit=True)
+            else:
+                config = BitsAndBytesConfig(
+                    load_in_4bit=True,
+                    bnb_4bit_quant_type="nf4",
+                    bnb_4bit_compute_dtype=torch.bfloat16
+                )
+            model = AutoModelForCausalLM.from_pretrained(model_name, quantization_config=config, device_map="auto")
+        logger.info(f"Loaded {LLM_QUANT} quantized LLM")
+        return model
+    
+    def _init_vllm(self, model_name: str):
+        """LangChain client for a vLLM OpenAI-compatible server hosting model_name"""
+        from langchain.llms import VLLMOpenAI
+        return VLLMOpenAI(
+            openai_api_key=os.getenv('VLLM_API_KEY', 'EMPTY'),
+            openai_api_base=VLLM_BASE_URL,
+            model_name=model_name,
+            temperature=float(os.getenv('TEMPERATURE', '0.7')),
+            max_tokens=int(os.getenv('MAX_TOKENS', '512'))
         )
-        
+    
+    def _init_qa_chain(self):
+        """Initialize QA chain with custom prompt"""
         if self.vectorstore and self.llm:
+            self.context_token_budget = self._context_token_budget()
             self.qa_chain = ConversationalRetrievalChain.from_llm(
                 llm=self.llm,
-                retriever=self.vectorstore.as_retriever(
-                    search_kwargs={
-                        "k": int(os.getenv('TOP_K_RETRIEVAL', '5'))
-                    }
-                ),
-                memory=self.memory,
-                combine_docs_chain_kwargs={"prompt": PROMPT},
+                retriever=self._build_retriever(int(os.getenv('TOP_K_RETRIEVAL', '5'))),
+                combine_docs_chain_kwargs={"prompt": RAG_PROMPT},
                 return_source_documents=True,
+                max_tokens_limit=self.context_token_budget,
                 verbose=True
             )
+            # Self-contained questions skip the extra LLM round trip that rephrases them against the history
+            generator = self.qa_chain.question_generator
+            self.qa_chain.question_generator = _FollowUpQuestionGenerator(llm=generator.llm, prompt=generator.prompt)
             logger.info("QA chain initialized successfully")
     
+    def _context_token_budget(self) -> Optional[int]:
+        """
+        Tokens left for retrieved documents once the static prompt, history, question and answer are
+        accounted for; the chain drops trailing documents beyond it. None (no limit) without a local tokenizer.
+        """
+        if self.tokenizer is None:
+            return None
+        # The static part of the prompt is tokenized once here, not per request
+        static_tokens = self._count_tokens(RAG_PROMPT.format(context="", chat_history="", question=""))
+        window = int(os.getenv('MODEL_MAX_LENGTH', '4096'))
+        answer_tokens = int(os.getenv('MAX_TOKENS', '512'))
+        budget = window - answer_tokens - static_tokens - MAX_HISTORY_TOKENS - QUESTION_TOKEN_RESERVE
+        logger.info(f"Retrieved context limited to {budget} tokens (static prompt: {static_tokens})")
+        return max(budget, 0)
+    
+    def _count_tokens(self, text: str) -> int:
+        """LLM token count for history budgeting; word count if no tokenizer was loaded"""
+        if self.tokenizer is None:
+            return len(text.split())
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+    
+    def _build_retriever(self, k: int) -> BaseRetriever:
+        """Batched retriever over the local FAISS index; Pinecone keeps the standard per-query retriever"""
+        if hasattr(self.vectorstore, "index") and hasattr(self.vectorstore, "index_to_docstore_id"):
+            return BatchedFAISSRetriever(vectorstore=self.vectorstore, embeddings=self.embedding_model, k=k)
+        return self.vectorstore.as_retriever(search_kwargs={"k": k})
+    
     def _load_travel_knowledge(self):
         """Load sustainable travel knowledge base"""
         knowledge_documents = [
@@ -260,11 +582,7 @@ class SustainableTravelRAGService:
         
         if self.vectorstore is None and self.embedding_model:
             # Use FAISS as fallback
-            from langchain.vectorstores import FAISS
-            self.vectorstore = FAISS.from_documents(
-                knowledge_documents,
-                self.embedding_model
-            )
+            self.vectorstore = self._build_faiss_store(knowledge_documents)
             logger.info("Loaded travel knowledge into FAISS vector store")
         elif self.vectorstore:
             # Add to existing Pinecone index
@@ -273,8 +591,43 @@ class SustainableTravelRAGService:
             self.vectorstore.add_texts(texts, metadatas)
             logger.info("Loaded travel knowledge into Pinecone vector store")
     
-    def get_travel_advice(self, question: str, user_context: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Get travel advice using RAG"""
+    def _build_faiss_store(self, documents: List[Document]):
+        """In-memory FAISS store on an HNSW graph index, so search stays sub-linear as documents are added"""
+        import faiss
+        from langchain.vectorstores import FAISS
+        from langchain.docstore.in_memory import InMemoryDocstore
+        
+        vectors = np.asarray(
+            self.embedding_model.embed_documents([doc.page_content for doc in documents]),
+            dtype='float32'
+        )
+        # Embeddings are L2-normalized, so the default L2 metric ranks exactly like cosine similarity
+        index = self._new_hnsw_index(vectors.shape[1])
+        index.hnsw.efConstruction = FAISS_EF_CONSTRUCTION
+        index.hnsw.efSearch = FAISS_EF_SEARCH
+        # Scalar quantizers learn per-dimension ranges once from the initial knowledge batch;
+        # later add_travel_documents calls only add to the trained index
+        if not index.is_trained:
+            index.train(vectors)
+        index.add(vectors)
+        docstore = InMemoryDocstore({str(i): doc for i, doc in enumerate(documents)})
+        return FAISS(self.embedding_model, index, docstore, {i: str(i) for i in range(len(documents))})
+    
+    @staticmethod
+    def _new_hnsw_index(dimension: int):
+        """HNSW index storing vectors per FAISS_SQ (scalar-quantized fp16/8bit, or full float32)"""
+        import faiss
+        qtypes = {'fp16': faiss.ScalarQuantizer.QT_fp16, '8bit': faiss.ScalarQuantizer.QT_8bit}
+        if FAISS_SQ in qtypes:
+            return faiss.IndexHNSWSQ(dimension, qtypes[FAISS_SQ], FAISS_HNSW_M)
+        if FAISS_SQ != 'none':
+            logger.warning(f"Unknown FAISS_SQ={FAISS_SQ}; storing float32 vectors")
+        return faiss.IndexHNSWFlat(dimension, FAISS_HNSW_M)
+    
+    async def get_travel_advice(
+        self, question: str, user_context: Dict[str, Any] = None, sender_id: str = "default"
+    ) -> Dict[str, Any]:
+        """Get travel advice using RAG; awaitable so concurrent users' generations can be batched by the LLM server"""
         try:
             if not self.qa_chain:
                 return {
@@ -283,17 +636,31 @@ class SustainableTravelRAGService:
                     "confidence": 0.5
                 }
             
+            history = await self.chat_history.load(sender_id)
+            cache_key = self._query_cache_key(question, user_context, history)
+            cached = self.query_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                await self.chat_history.append(sender_id, question, cached["answer"])
+                return {**cached, "chat_history": history + [(question, cached["answer"])], "cached": True}
+            
             # Enhance question with context
             enhanced_question = self._enhance_question(question, user_context)
             
-            # Get answer from RAG chain
-            result = self.qa_chain({"question": enhanced_question})
+            # Get answer from RAG chain; history is passed per call since the chain is shared by all senders
+            result = await self.qa_chain.acall({"question": enhanced_question, "chat_history": history})
             
-            return {
+            advice = {
                 "answer": result.get("answer", ""),
                 "sources": [doc.metadata for doc in result.get("source_documents", [])],
-                "confidence": self._calculate_confidence(result),
-                "chat_history": self.memory.chat_memory.messages[-10:]  # Last 10 messages
+                "confidence": self._calculate_confidence(result)
+            }
+            if cache_key:
+                self.query_cache.set(cache_key, advice)
+            await self.chat_history.append(sender_id, question, advice["answer"])
+            return {
+                **advice,
+                "chat_history": history + [(question, advice["answer"])],  # (human, ai) turns, oldest first
+                "cached": False
             }
             
         except Exception as e:
@@ -304,18 +671,135 @@ class SustainableTravelRAGService:
                 "confidence": 0.0
             }
     
+    async def stream_travel_advice(
+        self, question: str, user_context: Dict[str, Any] = None, sender_id: str = "default"
+    ) -> AsyncIterator[str]:
+        """
+        Like get_travel_advice, but yields answer text as it is generated so callers (e.g. a
+        FastAPI StreamingResponse) can show the first tokens immediately. Closing the iterator
+        early stops generation.
+        """
+        if not self.qa_chain:
+            yield "I'm sorry, but my knowledge base is not available right now. However, I can provide basic sustainable travel advice based on general principles."
+            return
+        
+        history = await self.chat_history.load(sender_id)
+        cache_key = self._query_cache_key(question, user_context, history)
+        cached = self.query_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            await self.chat_history.append(sender_id, question, cached["answer"])
+            yield cached["answer"]
+            return
+        
+        try:
+            # Same steps as the QA chain (condense, retrieve, stuff), with only the final generation streamed
+            enhanced_question = self._enhance_question(question, user_context)
+            history_text = self._format_chat_history(history)
+            if history:
+                enhanced_question = await self.qa_chain.question_generator.arun(
+                    question=enhanced_question, chat_history=history_text
+                )
+            docs = self._fit_context(await self.qa_chain.retriever.aget_relevant_documents(enhanced_question))
+            prompt = RAG_PROMPT.format(
+                context="\n\n".join(doc.page_content for doc in docs),
+                chat_history=history_text,
+                question=enhanced_question
+            )
+            
+            parts = []
+            async for token in self._stream_llm(prompt):
+                parts.append(token)
+                yield token
+        except Exception as e:
+            logger.error(f"Error streaming travel advice: {e}")
+            yield "I encountered an error while processing your question. Please try rephrasing it."
+            return
+        
+        answer = "".join(parts)
+        if cache_key:
+            result = {"answer": answer, "source_documents": docs}
+            self.query_cache.set(cache_key, {
+                "answer": answer,
+                "sources": [doc.metadata for doc in docs],
+                "confidence": self._calculate_confidence(result)
+            })
+        await self.chat_history.append(sender_id, question, answer)
+    
+    async def _stream_llm(self, prompt: str) -> AsyncIterator[str]:
+        """Token text for prompt: a TextIteratorStreamer for the local pipeline, astream for server-backed LLMs"""
+        if not isinstance(self.llm, HuggingFacePipeline):
+            async for chunk in self.llm.astream(prompt):
+                yield chunk
+            return
+        
+        hf_pipeline = self.llm.pipeline
+        streamer = TextIteratorStreamer(hf_pipeline.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        stop = threading.Event()
+        inputs = hf_pipeline.tokenizer(prompt, return_tensors="pt").to(hf_pipeline.model.device)
+        thread = threading.Thread(
+            target=hf_pipeline.model.generate,
+            kwargs={
+                **inputs,
+                "streamer": streamer,
+                "max_new_tokens": int(os.getenv('MAX_TOKENS', '512')),
+                "temperature": float(os.getenv('TEMPERATURE', '0.7')),
+                "do_sample": True,
+                "stopping_criteria": StoppingCriteriaList([_StopOnEvent(stop)])
+            },
+            daemon=True
+        )
+        thread.start()
+        try:
+            while True:
+                # The streamer blocks on a queue, so each read waits on a worker thread
+                token = await asyncio.to_thread(next, streamer, None)
+                if token is None:
+                    break
+                if token:
+                    yield token
+        finally:
+            stop.set()
+    
+    def _fit_context(self, docs: List[Document]) -> List[Document]:
+        """Leading documents that fit context_token_budget, matching the QA chain's max_tokens_limit"""
+        if self.context_token_budget is None:
+            return docs
+        remaining = self.context_token_budget
+        for i, doc in enumerate(docs):
+            remaining -= self._count_tokens(doc.page_content)
+            if remaining < 0:
+                return docs[:i]
+        return docs
+    
+    @staticmethod
+    def _format_chat_history(history: List[Tuple[str, str]]) -> str:
+        """(human, ai) turns in the layout ConversationalRetrievalChain uses for {chat_history}"""
+        return "".join(f"\nHuman: {human}\nAssistant: {ai}" for human, ai in history)
+    
+    def _query_cache_key(
+        self, question: str, user_context: Dict[str, Any] = None, history: List[Tuple[str, str]] = None
+    ) -> Optional[bytes]:
+        """
+        Digest of the whitespace/case-normalized question plus the user context, or None once the
+        conversation has history: the answer then depends on earlier turns ({chat_history} in the
+        prompt, condensed follow-ups), so it must not be shared with other conversations or senders
+        """
+        if history:
+            return None
+        normalized = " ".join(question.lower().split())
+        context = json.dumps(user_context or {}, sort_keys=True, default=str)
+        return hashlib.blake2b(f"{normalized}\x00{context}".encode("utf-8"), digest_size=16).digest()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Size and hit rate of the query cache"""
+        return self.query_cache.stats()
+    
     def _enhance_question(self, question: str, user_context: Dict[str, Any] = None) -> str:
         """Enhance question with user context"""
         if not user_context:
             return question
         
-        context_parts = []
-        if user_context.get("destination"):
-            context_parts.append(f"traveling to {user_context['destination']}")
-        if user_context.get("budget"):
-            context_parts.append(f"with a budget of {user_context['budget']}")
-        if user_context.get("duration"):
-            context_parts.append(f"for {user_context['duration']}")
+        context_parts = [phrase.format(user_context[key]) for key, phrase in _USER_CONTEXT_PHRASES if user_context.get(key)]
         if user_context.get("interests"):
             context_parts.append(f"interested in {', '.join(user_context['interests'])}")
         
@@ -338,14 +822,27 @@ class SustainableTravelRAGService:
     
     def add_travel_document(self, content: str, metadata: Dict[str, Any]):
         """Add new travel document to knowledge base"""
-        if self.vectorstore and self.embedding_model:
-            self.vectorstore.add_texts([content], [metadata])
-            logger.info(f"Added new document to knowledge base: {metadata}")
+        self.add_travel_documents([(content, metadata)])
+    
+    def add_travel_documents(self, documents: List[Tuple[str, Dict[str, Any]]]):
+        """Add several (content, metadata) documents with one batched embedding pass"""
+        if self.vectorstore and self.embedding_model and documents:
+            texts = [content for content, _ in documents]
+            metadatas = [metadata for _, metadata in documents]
+            self.vectorstore.add_texts(texts, metadatas)
+            # Cached answers were retrieved without these documents
+            self.query_cache.clear()
+            logger.info(f"Added {len(documents)} new documents to knowledge base")
     
-    def clear_conversation_memory(self):
+    async def clear_conversation_memory(self, sender_id: str = "default"):
         """Clear conversation memory"""
-        self.memory.clear()
-        logger.info("Conversation memory cleared")
+        await self.chat_history.clear(sender_id)
+        logger.info(f"Conversation memory cleared for {sender_id}")
 
-# Initialize global service instance
-rag_service = SustainableTravelRAGService()
\ No newline at end of file
+@functools.cache
+def get_rag_service() -> SustainableTravelRAGService:
+    """
+    Process-wide service instance, built on first use rather than at import, so importing this
+    module (e.g. during test collection) doesn't load the embedding model, vector store and LLM
+    """
+    return SustainableTravelRAGService()
\ No newline at end of file
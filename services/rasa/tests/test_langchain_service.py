@@ -0,0 +1,40 @@
+import asyncio
+from services.langchain_service import SustainableTravelRAGService
+from utils.query_cache import QueryCache
+
+class MockChatHistory:
+    def __init__(self, turns):
+        self.turns = turns
+    async def load(self, sender_id):
+        return list(self.turns.get(sender_id, []))
+    async def append(self, sender_id, human, ai):
+        self.turns.setdefault(sender_id, []).append((human, ai))
+
+class MockChain:
+    # Answers from the last human turn, the way a condensed follow-up resolves "there"
+    async def acall(self, inputs):
+        history = inputs["chat_history"]
+        topic = history[-1][0] if history else inputs["question"]
+        return {"answer": f"Getting to {topic}", "source_documents": []}
+
+def make_service(turns):
+    service = SustainableTravelRAGService.__new__(SustainableTravelRAGService)
+    service.qa_chain = MockChain()
+    service.chat_history = MockChatHistory(turns)
+    service.query_cache = QueryCache(max_size=10, ttl=60)
+    return service
+
+def test_follow_up_answers_are_not_shared_across_senders():
+    service = make_service({"alice": [("Lisbon", "Lisbon is walkable.")], "bob": [("Oslo", "Oslo has great trams.")]})
+    first = asyncio.run(service.get_travel_advice("How do I get there?", sender_id="alice"))
+    second = asyncio.run(service.get_travel_advice("How do I get there?", sender_id="bob"))
+    assert first["answer"] == "Getting to Lisbon"
+    assert second["answer"] == "Getting to Oslo"
+    assert not second["cached"]
+
+def test_opening_questions_are_cached():
+    service = make_service({})
+    asyncio.run(service.get_travel_advice("Eco hotels in Lisbon", sender_id="alice"))
+    result = asyncio.run(service.get_travel_advice("eco hotels in  lisbon", sender_id="bob"))
+    assert result["cached"]
+    assert result["answer"] == "Getting to Eco hotels in Lisbon"
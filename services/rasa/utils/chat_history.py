@@ -0,0 +1,68 @@
+# rasa_bot/utils/chat_history.py
+import logging
+from typing import Callable, List, Tuple
+
+import orjson
+import redis
+import redis.asyncio
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBudgetChatHistory:
+    """
+    Per-sender conversation turns kept in Redis, so history is shared by every worker and survives restarts.
+    Each sender has a list `mem:{sender_id}` of the newest `max_turns` turns (newest first) that expires
+    `ttl` seconds after the last turn; load() returns the newest turns that fit within `max_tokens`.
+    The client is a redis.asyncio one so history round trips never block the event loop.
+    """
+
+    def __init__(self, client: redis.asyncio.Redis, count_tokens: Callable[[str], int],
+                 max_turns: int = 10, max_tokens: int = 1500, ttl: int = 24 * 3600):
+        self.client = client
+        self.count_tokens = count_tokens
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(sender_id: str) -> str:
+        return f"mem:{sender_id}"
+
+    async def load(self, sender_id: str) -> List[Tuple[str, str]]:
+        """(human, ai) turns, oldest first, trimmed to the token budget"""
+        try:
+            raw_turns = await self.client.lrange(self._key(sender_id), 0, self.max_turns - 1)
+        except redis.RedisError as e:
+            logger.warning(f"Chat history unavailable for {sender_id}: {e}")
+            return []
+        turns = []
+        budget = self.max_tokens
+        for raw in raw_turns:
+            turn = orjson.loads(raw)
+            # Token counts are stored with each turn, so loading never re-tokenizes
+            budget -= turn["tokens"]
+            if budget < 0:
+                break
+            turns.append((turn["human"], turn["ai"]))
+        turns.reverse()
+        return turns
+
+    async def append(self, sender_id: str, human: str, ai: str):
+        turn = {"human": human, "ai": ai, "tokens": self.count_tokens(human) + self.count_tokens(ai)}
+        key = self._key(sender_id)
+        try:
+            # LPUSH + LTRIM + EXPIRE in one round trip
+            pipe = self.client.pipeline(transaction=False)
+            pipe.lpush(key, orjson.dumps(turn))
+            pipe.ltrim(key, 0, self.max_turns - 1)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Failed to store chat history for {sender_id}: {e}")
+
+    async def clear(self, sender_id: str):
+        try:
+            await self.client.delete(self._key(sender_id))
+        except redis.RedisError as e:
+            logger.warning(f"Failed to clear chat history for {sender_id}: {e}")
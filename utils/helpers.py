@@ -1,8 +1,18 @@
 import os
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+SERVICE_CHECK_TIMEOUT = 3  # seconds
+SERVICE_CHECK_POOL_SIZE = 32  # kept-alive connections per host
+
+# Shared clients for is_service_available(_async), created on first use so repeat checks reuse
+# warm connections instead of opening a new TCP (and TLS) connection every call
+_session = None
+_session_lock = threading.Lock()
+_async_client = None
+
 def get_env_variable(name, default=None, required=False):
     """
     Retrieve an environment variable and handle errors.
@@ -21,17 +31,64 @@ def get_env_variable(name, default=None, required=False):
         raise EnvironmentError(f"Required environment variable '{name}' is missing.")
     return value
 
+def _get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+                session = requests.Session()
+                # No retries: a health check should report an unreachable service, not wait on it
+                adapter = HTTPAdapter(
+                    pool_connections=SERVICE_CHECK_POOL_SIZE,
+                    pool_maxsize=SERVICE_CHECK_POOL_SIZE,
+                    max_retries=Retry(total=0)
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
 def is_service_available(url):
     """
     Check if a service is available at the given URL.
+    Sends HEAD (no body download) and falls back to GET if the service doesn't allow HEAD.
+    Args:
+        url (str): Service URL.
+    Returns:
+        bool: True if service is reachable, False otherwise.
+    """
+    session = _get_session()
+    try:
+        response = session.head(url, timeout=SERVICE_CHECK_TIMEOUT)
+        if response.status_code == 405:
+            response = session.get(url, timeout=SERVICE_CHECK_TIMEOUT)
+        return response.status_code == 200
+    except Exception as e:
+        logger.warning(f"Service at {url} is not available: {e}")
+        return False
+
+async def is_service_available_async(url):
+    """
+    Async variant of is_service_available using a shared httpx.AsyncClient.
     Args:
         url (str): Service URL.
     Returns:
         bool: True if service is reachable, False otherwise.
     """
-    import requests
+    global _async_client
+    import httpx
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(
+            timeout=SERVICE_CHECK_TIMEOUT,
+            limits=httpx.Limits(max_keepalive_connections=SERVICE_CHECK_POOL_SIZE)
+        )
     try:
-        response = requests.get(url, timeout=3)
+        response = await _async_client.head(url)
+        if response.status_code == 405:
+            response = await _async_client.get(url)
         return response.status_code == 200
     except Exception as e:
         logger.warning(f"Service at {url} is not available: {e}")
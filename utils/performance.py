@@ -1,30 +1,70 @@
+import os
 import asyncio
 import functools
 import time
 import logging
-import redis
+import threading
+import hashlib
+import bisect
 import pickle
-from typing import Any, Callable, List, Dict, Optional
-from concurrent.futures import ThreadPoolExecutor
+import redis
+import redis.asyncio
+import orjson
+from typing import Any, Awaitable, Callable, List, Dict, Optional, Set, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # --- Redis Caching ---
-REDIS_URL = "redis://localhost:6379/0"
-redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=False)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Optional replica for cache reads; defaults to the primary
+REDIS_READ_URL = os.getenv("REDIS_READ_URL", REDIS_URL)
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONN", "64"))
+REDIS_HEALTH_CHECK_INTERVAL = 30  # seconds idle before a pooled connection is PINGed on checkout
+
+def _redis_pool(url: str) -> redis.ConnectionPool:
+    return redis.ConnectionPool.from_url(
+        url,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        socket_keepalive=True,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL
+    )
+
+# One process-wide pool per endpoint; every client and get_redis_pool() share it
+_redis_pool_rw = _redis_pool(REDIS_URL)
+_redis_pool_ro = _redis_pool_rw if REDIS_READ_URL == REDIS_URL else _redis_pool(REDIS_READ_URL)
+redis_client = redis.Redis(connection_pool=_redis_pool_rw)
+redis_read_client = redis.Redis(connection_pool=_redis_pool_ro)
+# Non-blocking client for coroutines (FastAPI handlers); connections are opened lazily on the running loop
+async_redis_client = redis.asyncio.Redis(
+    connection_pool=redis.asyncio.ConnectionPool.from_url(
+        REDIS_URL,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        socket_keepalive=True,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL
+    )
+)
 
 # --- Caching Decorators ---
+_KEY_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+def _cache_key(func: Callable, args: tuple, kwargs: dict) -> str:
+    # Stable across processes and Python versions (unlike pickle); non-JSON args fall back to str()
+    payload = orjson.dumps([args, kwargs], option=_KEY_OPTIONS, default=str)
+    return f"{func.__module__}.{func.__qualname__}:{hashlib.blake2b(payload, digest_size=16).hexdigest()}"
+
 def redis_cache(ttl: int = 3600):
     """
     Decorator for Redis-based caching of function results.
+    Results are pickled, so cached calls return exactly the types the function does; None is
+    cached too, so empty results are not recomputed.
     """
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            key = f"{func.__name__}:{pickle.dumps((args, kwargs))}"
-            cached = redis_client.get(key)
-            if cached:
+            key = _cache_key(func, args, kwargs)
+            cached = redis_read_client.get(key)
+            if cached is not None:
                 logger.info(f"Cache hit for {func.__name__}")
                 return pickle.loads(cached)
             result = func(*args, **kwargs)
@@ -33,6 +73,25 @@ def redis_cache(ttl: int = 3600):
         return wrapper
     return decorator
 
+def async_redis_cache(ttl: int = 3600):
+    """
+    Async variant of redis_cache for coroutine functions, backed by redis.asyncio
+    so cache lookups never block the event loop or park a worker thread.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = _cache_key(func, args, kwargs)
+            cached = await async_redis_client.get(key)
+            if cached is not None:
+                logger.info(f"Cache hit for {func.__name__}")
+                return pickle.loads(cached)
+            result = await func(*args, **kwargs)
+            await async_redis_client.setex(key, ttl, pickle.dumps(result))
+            return result
+        return wrapper
+    return decorator
+
 # --- Async Processing ---
 async def run_async(func: Callable, *args, **kwargs):
     loop = asyncio.get_event_loop()
@@ -42,40 +101,217 @@ async def run_async(func: Callable, *args, **kwargs):
 class RequestBatcher:
     """
     Batches requests for external API calls to optimize throughput.
+    Thread-safe: a batch is dispatched to the executor once batch_size requests are queued or
+    max_delay seconds after the first queued one, whichever comes first. add_request() returns a
+    Future resolved with that request's entry of handler(batch) (one result per request, in order).
     """
-    def __init__(self, batch_size: int = 10):
+    def __init__(self, batch_size: int = 10, handler: Optional[Callable[[List[Any]], List[Any]]] = None,
+                 max_delay: float = 0.02):
         self.batch_size = batch_size
-        self.queue = []
+        self.handler = handler or self.process_batch
+        self.max_delay = max_delay
+        self.queue: List[Tuple[Any, Future]] = []
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
         self.executor = ThreadPoolExecutor(max_workers=4)
 
-    def add_request(self, req):
-        self.queue.append(req)
-        if len(self.queue) >= self.batch_size:
-            self.process_batch()
+    def add_request(self, req) -> Future:
+        future = Future()
+        batch = None
+        with self._lock:
+            self.queue.append((req, future))
+            if len(self.queue) >= self.batch_size:
+                batch = self._take_batch()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self.executor.submit(self._run, batch)
+        return future
+
+    def flush(self):
+        """Dispatch everything queued so far (timer callback; also call at shutdown)"""
+        while True:
+            with self._lock:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self.executor.submit(self._run, batch)
 
-    def process_batch(self):
-        batch = self.queue[:self.batch_size]
-        self.queue = self.queue[self.batch_size:]
-        # Replace with actual batch processing logic
+    def process_batch(self, batch: List[Any]) -> List[Any]:
+        # Replace with actual batch processing logic (or pass handler=)
         logger.info(f"Processing batch of {len(batch)} requests")
         return batch
 
+    def _take_batch(self) -> List[Tuple[Any, Future]]:
+        # Caller holds self._lock
+        batch, self.queue = self.queue[:self.batch_size], self.queue[self.batch_size:]
+        if not self.queue and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _run(self, batch: List[Tuple[Any, Future]]):
+        try:
+            results = self.handler([req for req, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+class AsyncRequestBatcher:
+    """
+    asyncio counterpart of RequestBatcher: concurrent submit() calls are coalesced into one
+    `await handler(batch)` per batch_size requests or per max_delay seconds, whichever comes first.
+    """
+    def __init__(self, handler: Callable[[List[Any]], Awaitable[List[Any]]], batch_size: int = 32,
+                 max_delay: float = 0.02):
+        self.handler = handler
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher_task: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+    async def submit(self, req) -> Any:
+        if self._flusher_task is None or self._flusher_task.done():
+            # Created on first use so the queue and task belong to the running loop
+            self._queue = asyncio.Queue()
+            self._flusher_task = asyncio.create_task(self._flusher())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((req, future))
+        return await future
+
+    async def aclose(self):
+        if self._flusher_task is not None:
+            self._flusher_task.cancel()
+            self._flusher_task = None
+
+    async def _flusher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Run the batch in its own task so the next one can fill while this is in flight
+            task = asyncio.create_task(self._run(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        try:
+            results = await self.handler([req for req, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
 # --- Connection Pooling ---
-def get_redis_pool():
-    return redis.ConnectionPool.from_url(REDIS_URL)
+def get_redis_pool() -> redis.ConnectionPool:
+    """The shared read/write pool (not a new pool per call)"""
+    return _redis_pool_rw
 
 # --- Performance Profiler ---
+PROFILER_FLUSH_SECONDS = 60.0  # how often aggregated span percentiles are logged
+# Histogram bucket upper bounds: 1 µs to ~100 s, each 10% above the last (percentiles accurate to ~10%)
+_LATENCY_BOUNDS_NS = [int(1_000 * 1.1 ** i) for i in range(194)]
+
+class _LatencyHistogram:
+    """Fixed log-scale bucket counts for one span name, so recording is O(log buckets) and percentiles cheap"""
+    __slots__ = ("counts", "total", "max_ns")
+
+    def __init__(self):
+        self.counts = [0] * (len(_LATENCY_BOUNDS_NS) + 1)
+        self.total = 0
+        self.max_ns = 0
+
+    def record(self, elapsed_ns: int):
+        self.counts[bisect.bisect_left(_LATENCY_BOUNDS_NS, elapsed_ns)] += 1
+        self.total += 1
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def percentile(self, pct: float) -> int:
+        """Upper bound (ns) of the bucket holding the pct-th percentile, capped at the observed max"""
+        rank = self.total * pct / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(_LATENCY_BOUNDS_NS[i], self.max_ns) if i < len(_LATENCY_BOUNDS_NS) else self.max_ns
+        return self.max_ns
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.total,
+            "p50_ms": self.percentile(50) / 1e6,
+            "p95_ms": self.percentile(95) / 1e6,
+            "p99_ms": self.percentile(99) / 1e6,
+            "max_ms": self.max_ns / 1e6,
+        }
+
+_histograms: Dict[str, _LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+
+def _flush_profiles():
+    while True:
+        time.sleep(PROFILER_FLUSH_SECONDS)
+        for name, summary in get_profile_stats(reset=True).items():
+            logger.info(
+                f"[Profiler] {name}: n={summary['count']} p50={summary['p50_ms']:.2f}ms "
+                f"p95={summary['p95_ms']:.2f}ms p99={summary['p99_ms']:.2f}ms max={summary['max_ms']:.2f}ms"
+            )
+
+def _record_span(name: str, elapsed_ns: int):
+    global _flusher
+    with _histograms_lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = _LatencyHistogram()
+        histogram.record(elapsed_ns)
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_profiles, name="profiler-flush", daemon=True)
+            _flusher.start()
+
+def get_profile_stats(reset: bool = False) -> Dict[str, Dict[str, float]]:
+    """Per-name span count and p50/p95/p99/max latency (ms) since start or the last reset"""
+    global _histograms
+    with _histograms_lock:
+        histograms = _histograms
+        if reset:
+            _histograms = {}
+        return {name: histogram.summary() for name, histogram in histograms.items()}
+
 class Profiler:
     """
     Context manager for profiling code execution time and identifying bottlenecks.
+    Spans are timed with perf_counter_ns and aggregated into per-name histograms;
+    percentiles are logged every PROFILER_FLUSH_SECONDS instead of once per span.
     """
     def __init__(self, name: str):
         self.name = name
+        self.elapsed_ns = 0
     def __enter__(self):
-        self.start = time.time()
+        self.start = time.perf_counter_ns()
+        return self
     def __exit__(self, exc_type, exc_val, exc_tb):
-        elapsed = time.time() - self.start
-        logger.info(f"[Profiler] {self.name} took {elapsed:.2f}s")
+        self.elapsed_ns = time.perf_counter_ns() - self.start
+        _record_span(self.name, self.elapsed_ns)
 
 # --- Memory Optimization ---
 def quantize_model(model):
@@ -95,10 +331,31 @@ def prune_model(model):
 # --- Response Compression ---
 from fastapi import Response
 import gzip
+import zstandard as zstd
 
-def compress_response(data: bytes) -> Response:
-    compressed = gzip.compress(data)
-    return Response(content=compressed, media_type="application/gzip")
+ZSTD_LEVEL = 3  # several times faster than gzip's default level at a similar ratio
+GZIP_LEVEL = 6  # for clients that don't advertise zstd (and callers that don't pass Accept-Encoding)
+
+# ZstdCompressor instances are not safe to share across threads, so each thread reuses its own
+_zstd_local = threading.local()
+
+def _zstd_compressor() -> zstd.ZstdCompressor:
+    cctx = getattr(_zstd_local, "cctx", None)
+    if cctx is None:
+        cctx = _zstd_local.cctx = zstd.ZstdCompressor(level=ZSTD_LEVEL)
+    return cctx
+
+def compress_response(data: bytes, accept_encoding: Optional[str] = None,
+                      media_type: str = "application/json") -> Response:
+    """
+    Compress a response body with zstd when the client's Accept-Encoding lists it, else gzip.
+    media_type describes the uncompressed payload; the codec is named only by Content-Encoding.
+    """
+    if accept_encoding and "zstd" in accept_encoding.lower():
+        compressed, encoding = _zstd_compressor().compress(data), "zstd"
+    else:
+        compressed, encoding = gzip.compress(data, compresslevel=GZIP_LEVEL), "gzip"
+    return Response(content=compressed, media_type=media_type, headers={"Content-Encoding": encoding})
 
 # --- CDN Integration (Stub) ---
 def cdn_url(path: str) -> str: